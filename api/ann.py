@@ -0,0 +1,138 @@
+"""Índice aproximado (IVF) en NumPy puro para galerías grandes.
+
+IVF = inverted file: los embeddings normalizados se agrupan con k-means
+esférico en `nlist` celdas; una consulta solo se compara contra las filas de
+las `nprobe` celdas con centroide más cercano. `nprobe` es la perilla
+recall/latencia: con nprobe == nlist la búsqueda es exacta.
+
+El índice no copia la matriz: `GalleryMatrix` reordena sus filas por celda y
+el índice guarda solo centroides, asignaciones y offsets.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+ASSIGN_CHUNK = 8192
+
+
+def assign_rows(matrix: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Celda (centroide de mayor similitud) de cada fila, procesando por bloques."""
+    out = np.empty(matrix.shape[0], dtype=np.int32)
+    for start in range(0, matrix.shape[0], ASSIGN_CHUNK):
+        block = matrix[start:start + ASSIGN_CHUNK]
+        out[start:start + ASSIGN_CHUNK] = np.argmax(block @ centroids.T, axis=1)
+    return out
+
+
+def train_centroids(matrix: np.ndarray, nlist: int, iters: int = 10, sample: int = 64, seed: int = 0) -> np.ndarray:
+    """k-means esférico sobre una muestra de hasta `nlist * sample` filas."""
+    rng = np.random.default_rng(seed)
+    n = matrix.shape[0]
+    train = matrix[rng.choice(n, size=min(n, nlist * sample), replace=False)]
+    centroids = train[rng.choice(train.shape[0], size=nlist, replace=False)].copy()
+    for _ in range(iters):
+        assign = assign_rows(train, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, train)
+        empty = ~sums.any(axis=1)
+        if empty.any():  # celdas vacías: re-sembrar con filas al azar
+            sums[empty] = train[rng.choice(train.shape[0], size=int(empty.sum()), replace=False)]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+    return centroids
+
+
+class IVFIndex:
+    """Celdas IVF sobre una matriz ya ordenada por celda (ver `GalleryMatrix`).
+
+    - centroids: (nlist, d) normalizados.
+    - offsets: (nlist + 1,) límites de cada celda en la matriz ordenada.
+    - trained_size: filas con las que se entrenaron los centroides (para decidir re-entrenar).
+    """
+
+    def __init__(self, centroids: np.ndarray, offsets: np.ndarray, trained_size: int, nprobe: int):
+        self.centroids = centroids
+        self.offsets = offsets
+        self.trained_size = trained_size
+        self.nprobe = max(1, min(nprobe, centroids.shape[0]))
+
+    @property
+    def nlist(self) -> int:
+        return int(self.centroids.shape[0])
+
+    def needs_retrain(self, size: int, dim: int) -> bool:
+        return dim != self.centroids.shape[1] or size > 2 * self.trained_size or size < self.trained_size // 2
+
+    def search(self, matrix: np.ndarray, q: np.ndarray, k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Top-k por consulta sobre las `nprobe` celdas más cercanas.
+
+        `q` son consultas normalizadas (n, d). Retorna, por consulta, (filas, distancias)
+        ordenadas de menor a mayor distancia, con filas relativas a `matrix`.
+        """
+        probes = np.argpartition(-(q @ self.centroids.T), self.nprobe - 1, axis=1)[:, :self.nprobe]
+        out: List[Tuple[np.ndarray, np.ndarray]] = []
+        for qi, cells in zip(q, probes):
+            rows: List[np.ndarray] = []
+            dists: List[np.ndarray] = []
+            for c in cells:
+                s, e = self.offsets[c], self.offsets[c + 1]
+                if e > s:
+                    rows.append(np.arange(s, e))
+                    dists.append(1.0 - matrix[s:e] @ qi)
+            if not rows:
+                out.append((np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)))
+                continue
+            cand = np.concatenate(rows)
+            dist = np.concatenate(dists)
+            kk = min(k, dist.shape[0])
+            top = np.argpartition(dist, kk - 1)[:kk] if kk < dist.shape[0] else np.arange(dist.shape[0])
+            top = top[np.argsort(dist[top], kind="stable")]
+            out.append((cand[top], dist[top]))
+        return out
+
+
+def build_ivf(
+    matrix: np.ndarray,
+    ids: np.ndarray,
+    nlist: int,
+    nprobe: int,
+    previous: Optional[IVFIndex] = None,
+    previous_assign: Optional[Dict[int, List[int]]] = None,
+    changed: Optional[set] = None,
+) -> Tuple[IVFIndex, np.ndarray, Dict[int, List[int]]]:
+    """Construye (o actualiza) el índice y devuelve (índice, orden de filas, asignación por id).
+
+    Si hay un índice previo que no necesita re-entrenarse, se reutilizan sus
+    centroides y solo se asignan las filas de ids nuevos o en `changed`; las
+    demás conservan su celda anterior.
+    """
+    n = matrix.shape[0]
+    if previous is not None and previous_assign is not None and not previous.needs_retrain(n, matrix.shape[1]):
+        centroids, trained_size = previous.centroids, previous.trained_size
+        assign = np.empty(n, dtype=np.int32)
+        todo: List[int] = []
+        seen: Dict[int, int] = {}
+        for i, eid in enumerate(ids.tolist()):
+            j = seen.get(eid, 0)
+            seen[eid] = j + 1
+            prev = previous_assign.get(eid)
+            if (changed is None or eid not in changed) and prev is not None and j < len(prev):
+                assign[i] = prev[j]
+            else:
+                todo.append(i)
+        if todo:
+            assign[todo] = assign_rows(matrix[todo], centroids)
+    else:
+        centroids = train_centroids(matrix, nlist)
+        trained_size = n
+        assign = assign_rows(matrix, centroids)
+    order = np.argsort(assign, kind="stable")
+    counts = np.bincount(assign, minlength=centroids.shape[0])
+    offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+    by_id: Dict[int, List[int]] = {}
+    for eid, c in zip(ids.tolist(), assign.tolist()):
+        by_id.setdefault(eid, []).append(c)
+    return IVFIndex(centroids, offsets, trained_size, nprobe), order, by_id
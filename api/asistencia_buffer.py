@@ -0,0 +1,350 @@
+"""Escritura diferida (write-behind) de asistencias para la ráfaga de fichadas.
+
+Con `ASISTENCIA_BUFFER=1`, `POST /asistencia` no escribe en la DB por request:
+valida el empleado y deduplica en memoria, anota el evento en un spool local
+(JSON lines, con fsync) y responde. Un thread vuelca los eventos pendientes
+cada `ASISTENCIA_BUFFER_FLUSH_MS` o al juntar `ASISTENCIA_BUFFER_MAX_EVENTS`,
+con un único INSERT multi-fila (`unnest`) por lote.
+
+Durabilidad: el spool se rota en cada lote (`*.flushing`) y se borra recién
+después del commit. Al arrancar, los spools huérfanos (de procesos que ya no
+tienen el lock del archivo) se re-insertan; el índice único
+`uq_asistencia_emp_tipo_dia` hace que re-insertar sea idempotente.
+
+La deduplicación en memoria es por proceso: con varios workers un duplicado
+puede recibir 200 en vez de 409, pero la DB igual conserva una sola fichada.
+
+Si Postgres no responde al arrancar, el buffer arranca igual (vacío) y sigue
+acusando y anotando en el spool: los empleados conocidos, las fichadas del día
+y los spools huérfanos se cargan en cuanto la DB vuelve. Mientras tanto no se
+rechazan empleados desconocidos (el volcado los descarta).
+"""
+
+import os
+import json
+import glob
+import time
+import logging
+import threading
+from collections import deque
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from typing import Deque, List, Optional, Set, Tuple
+
+from sqlalchemy import text
+
+from .database import as_utc, get_session
+from .metrics import record_write, register_collector
+
+try:  # lock de spool entre procesos (no disponible en Windows)
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+ASISTENCIA_BUFFER = (os.environ.get("ASISTENCIA_BUFFER") or os.environ.get("asistencia_buffer") or "0") == "1"
+ASISTENCIA_BUFFER_FLUSH_MS = int(os.environ.get("ASISTENCIA_BUFFER_FLUSH_MS") or os.environ.get("asistencia_buffer_flush_ms") or 500)
+ASISTENCIA_BUFFER_MAX_EVENTS = int(os.environ.get("ASISTENCIA_BUFFER_MAX_EVENTS") or os.environ.get("asistencia_buffer_max_events") or 200)
+ASISTENCIA_SPOOL_DIR = os.environ.get("ASISTENCIA_SPOOL_DIR") or os.environ.get("asistencia_spool_dir") or "spool"
+# fsync por evento: sin él, un corte de luz puede perder lo acusado en el último instante
+ASISTENCIA_SPOOL_FSYNC = (os.environ.get("ASISTENCIA_SPOOL_FSYNC") or os.environ.get("asistencia_spool_fsync") or "1") == "1"
+
+# Resultados de `submit`
+QUEUED = "queued"
+DUPLICATE = "duplicate"
+UNKNOWN_EMPLOYEE = "unknown"
+
+BATCH_INSERT_SQL = text(
+    """
+    INSERT INTO asistencia (id_empleado, fecha, tipo)
+    SELECT u.id, u.f::timestamp, u.t
+    FROM unnest(CAST(:ids AS integer[]), CAST(:fechas AS timestamptz[]), CAST(:tipos AS text[])) AS u(id, f, t)
+    WHERE EXISTS (SELECT 1 FROM empleado e WHERE e.id_empleado = u.id)
+    ON CONFLICT DO NOTHING
+    """
+)
+
+Event = Tuple[int, str, datetime]  # (id_empleado, tipo_db, instante con zona)
+
+# Con la DB caída al arrancar, cada cuánto se reintenta cargar el estado inicial
+WARM_RETRY_S = 5.0
+
+
+def _db_timezone(db) -> tzinfo:
+    """Zona horaria de la sesión Postgres (define qué es 'hoy' para `fecha`)."""
+    name = db.execute(text("SHOW TimeZone")).scalar_one()
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo(name)
+    except Exception:
+        offset = db.execute(text("SELECT EXTRACT(TIMEZONE FROM now())")).scalar_one()
+        return timezone(timedelta(seconds=int(offset)))
+
+
+def _lock_file(f) -> bool:
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+class AsistenciaBuffer:
+    """Cola en memoria + spool local + thread de volcado por lotes."""
+
+    def __init__(self, spool_dir: str, flush_ms: int, max_events: int, fsync: bool = True):
+        self.spool_dir = spool_dir
+        self.flush_interval = flush_ms / 1000.0
+        self.max_events = max_events
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._pending: List[Event] = []
+        self._inflight: List[Event] = []
+        self._inflight_path: Optional[str] = None
+        self._seq = 0
+        self._seen: Set[Tuple[int, str, date]] = set()
+        self._day: Optional[date] = None
+        self._known: Set[int] = set()
+        self._tz: tzinfo = timezone.utc
+        self._spool = None
+        self._spool_path = os.path.join(spool_dir, f"asistencia-{os.getpid()}.spool")
+        self._thread: Optional[threading.Thread] = None
+        self._warm = False  # estado inicial (empleados, fichadas de hoy, huérfanos) ya cargado
+        self._warm_retry_at = 0.0
+        # Métricas
+        self.batches = 0
+        self.events_flushed = 0
+        self.flush_failures = 0
+        self.last_flush_at: Optional[float] = None
+        self.flush_ms: Deque[float] = deque(maxlen=256)
+        self.batch_sizes: Deque[int] = deque(maxlen=256)
+
+    # Ciclo de vida
+    def start(self):
+        os.makedirs(self.spool_dir, exist_ok=True)
+        if os.path.exists(self._spool_path):  # mismo pid que un proceso anterior: recuperarlo como huérfano
+            os.replace(self._spool_path, f"{self._spool_path}.0.flushing")
+        self._spool = open(self._spool_path, "a", encoding="utf-8")
+        _lock_file(self._spool)
+        self._warm_up()
+        self._thread = threading.Thread(target=self._run, name="asistencia-flush", daemon=True)
+        self._thread.start()
+
+    def _warm_up(self) -> bool:
+        """Carga el estado inicial desde la DB; si no responde, se reintenta desde el thread de volcado."""
+        try:
+            with get_session() as db:
+                tz = _db_timezone(db)
+                known = {r[0] for r in db.execute(text("SELECT id_empleado FROM empleado"))}
+                rows = db.execute(
+                    text("SELECT id_empleado, tipo FROM asistencia WHERE fecha >= current_date AND fecha < current_date + 1")
+                ).all()
+            today = datetime.now(tz).date()
+            with self._lock:
+                self._tz = tz
+                self._known |= known
+                # Lo acusado mientras la DB no respondía sigue contando para el dedupe
+                self._seen = {(r[0], r[1], today) for r in rows} | {k for k in self._seen if k[2] == today}
+                self._day = today
+            self._recover_orphans()
+        except Exception:
+            if not self._warm_retry_at:  # el detalle solo la primera vez: se reintenta cada WARM_RETRY_S
+                logger.warning("Buffer de asistencia sin DB al iniciar; se sigue anotando en el spool", exc_info=True)
+            self._warm_retry_at = time.monotonic() + WARM_RETRY_S
+            return False
+        self._warm = True
+        return True
+
+    def stop(self, timeout: float = 10.0):
+        """Vuelca lo pendiente antes de terminar (shutdown ordenado)."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        with self._lock:
+            if self._spool is not None and not self._pending and not self._inflight:
+                self._spool.close()
+                os.remove(self._spool_path)  # todo volcado: no dejar spool vacío
+                self._spool = None
+
+    # Camino del request
+    def submit(self, empleado_id: int, tipo_api: str) -> str:
+        """Valida, deduplica y encola una fichada. Retorna QUEUED, DUPLICATE o UNKNOWN_EMPLOYEE."""
+        tipo_db = 'entrada' if tipo_api == 'ingreso' else 'salida'
+        if empleado_id not in self._known and not self._employee_exists(empleado_id):
+            return UNKNOWN_EMPLOYEE
+        now = datetime.now(self._tz)
+        key = (empleado_id, tipo_db, now.date())
+        with self._lock:
+            if key in self._seen:
+                return DUPLICATE
+            if key[2] != self._day:  # cambio de día: olvidar las fichadas de ayer
+                self._seen = {k for k in self._seen if k[2] == key[2]}
+                self._day = key[2]
+            self._seen.add(key)
+            self._spool.write(json.dumps({"id": empleado_id, "t": tipo_db, "f": now.isoformat()}) + "\n")
+            self._spool.flush()
+            if self.fsync:
+                os.fsync(self._spool.fileno())
+            self._pending.append((empleado_id, tipo_db, now))
+            full = len(self._pending) >= self.max_events
+        if full:
+            self._wake.set()
+        return QUEUED
+
+    def remember(self, empleado_id: int, tipo_db: str, when: datetime):
+        """Marca como ya registrada una fichada escrita por otro camino (p. ej. /asistencia/batch)."""
+        day = as_utc(when).astimezone(self._tz).date()  # sin zona, astimezone() asumiría la hora local del proceso
+        with self._lock:
+            if day == self._day:
+                self._seen.add((empleado_id, tipo_db, day))
+
+    def _employee_exists(self, empleado_id: int) -> bool:
+        try:
+            with get_session() as db:
+                ok = db.execute(text("SELECT 1 FROM empleado WHERE id_empleado=:id"), {"id": empleado_id}).first() is not None
+        except Exception:
+            # DB caída: se acusa igual (el volcado descarta empleados inexistentes)
+            logger.warning("No se pudo validar el empleado %s; se acepta la fichada", empleado_id)
+            return True
+        if ok:
+            self._known.add(empleado_id)
+        return ok
+
+    # Volcado
+    def _rotate(self) -> bool:
+        """Mueve lo pendiente a 'en vuelo' y rota el spool para que el lote tenga su propio archivo."""
+        with self._lock:
+            if not self._pending:
+                return False
+            self._seq += 1
+            self._inflight, self._pending = self._pending, []
+            self._spool.close()
+            self._inflight_path = f"{self._spool_path}.{self._seq}.flushing"
+            os.replace(self._spool_path, self._inflight_path)
+            self._spool = open(self._spool_path, "a", encoding="utf-8")
+            _lock_file(self._spool)
+            return True
+
+    def _insert(self, events: List[Event]):
+        with get_session() as db:
+            db.execute(
+                BATCH_INSERT_SQL,
+                {"ids": [e[0] for e in events], "fechas": [e[2] for e in events], "tipos": [e[1] for e in events]},
+            )
+            db.commit()
+
+    def flush(self) -> int:
+        """Inserta el lote en vuelo (o rota uno nuevo). Si falla, el lote se reintenta en la próxima vuelta."""
+        if not self._inflight and not self._rotate():
+            return 0
+        t0 = time.perf_counter()
+        try:
+            self._insert(self._inflight)
+        except Exception:
+            self.flush_failures += 1
+            logger.exception("No se pudo volcar el lote de asistencias (%d eventos); se reintenta", len(self._inflight))
+            return 0
+        n = len(self._inflight)
+        elapsed = time.perf_counter() - t0
+        record_write(elapsed)
+        self.flush_ms.append(elapsed * 1000.0)
+        self.batch_sizes.append(n)
+        self.batches += 1
+        self.events_flushed += n
+        self.last_flush_at = time.time()
+        os.remove(self._inflight_path)
+        self._inflight, self._inflight_path = [], None
+        return n
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if not self._warm and time.monotonic() >= self._warm_retry_at:
+                self._warm_up()
+            while self.flush() >= self.max_events:
+                pass  # ráfaga: seguir vaciando sin esperar el intervalo
+        while self._inflight or self._pending:
+            if not self.flush():
+                break
+
+    def _recover_orphans(self):
+        """Re-inserta spools de procesos caídos (o de este mismo pid antes de reiniciar)."""
+        for path in sorted(glob.glob(os.path.join(self.spool_dir, "asistencia-*.spool*"))):
+            if path == self._spool_path:
+                continue
+            owner = path.split(".spool")[0] + ".spool"
+            guard = None
+            try:
+                if owner != self._spool_path and os.path.exists(owner):
+                    # Se mantiene el lock mientras se recupera: evita que dos workers lo repitan
+                    guard = open(owner, "a", encoding="utf-8")
+                    if not _lock_file(guard):
+                        continue  # spool de un worker vivo
+                events: List[Event] = []
+                with open(path, encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            e = json.loads(line)
+                            events.append((int(e["id"]), e["t"], datetime.fromisoformat(e["f"])))
+                        except (ValueError, KeyError):
+                            continue  # línea truncada por el corte
+                if events:
+                    self._insert(events)
+                os.remove(path)
+                logger.info("Spool de asistencia recuperado: %s (%d eventos)", path, len(events))
+            except FileNotFoundError:
+                continue  # lo recuperó otro worker
+            finally:
+                if guard is not None:
+                    guard.close()
+
+    def stats(self) -> dict:
+        def pct(values, p):
+            if not values:
+                return None
+            s = sorted(values)
+            return s[min(len(s) - 1, int(round(p / 100.0 * (len(s) - 1))))]
+
+        with self._lock:
+            pending, inflight = len(self._pending), len(self._inflight)
+        return {
+            "warm": self._warm,
+            "pending": pending,
+            "inflight": inflight,
+            "batches": self.batches,
+            "events_flushed": self.events_flushed,
+            "flush_failures": self.flush_failures,
+            "last_flush_age_s": (time.time() - self.last_flush_at) if self.last_flush_at else None,
+            "flush_ms_p50": pct(self.flush_ms, 50),
+            "flush_ms_p95": pct(self.flush_ms, 95),
+            "flush_ms_max": max(self.flush_ms) if self.flush_ms else None,
+            "batch_size_avg": (sum(self.batch_sizes) / len(self.batch_sizes)) if self.batch_sizes else None,
+            "batch_size_max": max(self.batch_sizes) if self.batch_sizes else None,
+        }
+
+
+asistencia_buffer: Optional[AsistenciaBuffer] = (
+    AsistenciaBuffer(ASISTENCIA_SPOOL_DIR, ASISTENCIA_BUFFER_FLUSH_MS, ASISTENCIA_BUFFER_MAX_EVENTS, ASISTENCIA_SPOOL_FSYNC)
+    if ASISTENCIA_BUFFER
+    else None
+)
+
+
+if asistencia_buffer is not None:
+    @register_collector
+    def _buffer_metrics():
+        st = asistencia_buffer.stats()
+        return [
+            ("asistencia_buffer_pending", "gauge", "Fichadas acusadas aún no volcadas.", [({}, st["pending"] + st["inflight"])]),
+            ("asistencia_buffer_batches_total", "counter", "Lotes volcados a Postgres.", [({}, st["batches"])]),
+            ("asistencia_buffer_events_flushed_total", "counter", "Fichadas volcadas a Postgres.", [({}, st["events_flushed"])]),
+            ("asistencia_buffer_flush_failures_total", "counter", "Volcados fallidos (se reintentan).", [({}, st["flush_failures"])]),
+            ("asistencia_buffer_last_flush_age_seconds", "gauge", "Segundos desde el último volcado.", [({}, st["last_flush_age_s"])]),
+        ]
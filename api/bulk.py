@@ -0,0 +1,123 @@
+"""Parseo y validación de importaciones masivas (CSV o JSON lines).
+
+`POST /employees/bulk` y `POST /registrar_rostro/bulk` reciben el archivo
+completo en el body. El formato se elige por Content-Type: `text/csv` (con
+encabezado) o JSON lines (`application/x-ndjson`, `application/jsonl`; un
+objeto por línea). Cada registro se valida con el mismo schema que el alta
+individual; los inválidos quedan en el reporte con su número de fila (1 =
+primer registro) sin frenar al resto. Un body que no es UTF-8 es 400 y pasar
+de `BULK_MAX_ROWS` registros corta el parseo con 413.
+"""
+
+import io
+import csv
+import json
+import math
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+
+from .schemas import EmployeeCreate, RegistrarRostroRequest
+
+
+BULK_MAX_ROWS = 20000
+
+
+def _check_rows(row: int):
+    # Se corta apenas se pasa el límite, sin parsear ni validar el resto del archivo
+    if row > BULK_MAX_ROWS:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"Máximo {BULK_MAX_ROWS} registros por importación")
+
+
+def iter_records(body: bytes, content_type: Optional[str]) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """(fila, registro, error de parseo) por cada registro no vacío del body."""
+    try:
+        text_body = body.decode("utf-8-sig")
+    except UnicodeDecodeError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"El archivo debe estar en UTF-8: {e}")
+    if (content_type or "").split(";")[0].strip().lower() == "text/csv":
+        for i, rec in enumerate(csv.DictReader(io.StringIO(text_body)), start=1):
+            _check_rows(i)
+            yield i, {k.strip(): (v.strip() if isinstance(v, str) else v) for k, v in rec.items() if k}, None
+        return
+    i = 0
+    for line in text_body.splitlines():
+        if not line.strip():
+            continue
+        i += 1
+        _check_rows(i)
+        try:
+            rec = json.loads(line)
+        except ValueError as e:
+            yield i, None, f"JSON inválido: {e}"
+            continue
+        yield i, rec if isinstance(rec, dict) else None, None if isinstance(rec, dict) else "Se esperaba un objeto JSON"
+
+
+def _error(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors())
+
+
+def parse_employees(body: bytes, content_type: Optional[str]) -> Tuple[List[Tuple[int, EmployeeCreate]], List[dict]]:
+    """Registros válidos (fila, EmployeeCreate) y filas inválidas ya en formato de reporte."""
+    valid: List[Tuple[int, EmployeeCreate]] = []
+    invalid: List[dict] = []
+    for row, rec, err in iter_records(body, content_type):
+        if err is not None:
+            invalid.append({"row": row, "dni": None, "status": "invalid", "detail": err})
+            continue
+        rec = {k: v for k, v in rec.items() if v not in ("", None)}  # celdas CSV vacías = campo ausente
+        try:
+            emp = EmployeeCreate(**rec)
+        except ValidationError as e:
+            invalid.append({"row": row, "dni": rec.get("dni"), "status": "invalid", "detail": _error(e)})
+            continue
+        if not emp.dni.isdigit() or len(emp.dni) > 8:
+            invalid.append({"row": row, "dni": emp.dni, "status": "invalid", "detail": "El DNI debe ser numérico y tener hasta 8 dígitos"})
+            continue
+        valid.append((row, emp))
+    return valid, invalid
+
+
+def parse_enrollments(body: bytes, content_type: Optional[str]) -> Tuple[List[Tuple[int, RegistrarRostroRequest]], List[dict]]:
+    """Como `parse_employees`; en CSV la columna `embedding` es un array JSON."""
+    valid: List[Tuple[int, RegistrarRostroRequest]] = []
+    invalid: List[dict] = []
+    for row, rec, err in iter_records(body, content_type):
+        if err is None and isinstance(rec.get("embedding"), str):
+            try:
+                rec["embedding"] = json.loads(rec["embedding"])
+            except ValueError:
+                err = "embedding debe ser un array JSON"
+        if err is not None:
+            invalid.append({"row": row, "dni": (rec or {}).get("dni"), "status": "invalid", "detail": err})
+            continue
+        try:
+            req = RegistrarRostroRequest(**rec)
+        except ValidationError as e:
+            invalid.append({"row": row, "dni": rec.get("dni"), "status": "invalid", "detail": _error(e)})
+            continue
+        if not all(math.isfinite(v) for v in req.embedding):
+            invalid.append({"row": row, "dni": req.dni, "status": "invalid", "detail": "embedding con valores no finitos"})
+            continue
+        valid.append((row, req))
+    # Todas las plantillas del lote deben compartir dimensión (la galería usa la mayoritaria)
+    dims: Dict[int, int] = {}
+    for _, req in valid:
+        dims[len(req.embedding)] = dims.get(len(req.embedding), 0) + 1
+    if len(dims) > 1:
+        dim = max(dims, key=dims.get)
+        for row, req in [v for v in valid if len(v[1].embedding) != dim]:
+            invalid.append({"row": row, "dni": req.dni, "status": "invalid", "detail": f"Dimensión {len(req.embedding)} distinta de la del lote ({dim})"})
+        valid = [v for v in valid if len(v[1].embedding) == dim]
+    return valid, invalid
+
+
+def report(results: List[dict]) -> dict:
+    """Reporte ordenado por fila con conteo por estado."""
+    results.sort(key=lambda r: r["row"])
+    counts: Dict[str, int] = {}
+    for r in results:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+    return {"total": len(results), "counts": counts, "results": results}
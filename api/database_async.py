@@ -0,0 +1,83 @@
+"""Acceso a datos asíncrono para el modo `API_ASYNC=1`.
+
+Cubre el camino caliente del tótem (asistencia) con un engine
+`create_async_engine` (psycopg 3 async) y el mismo SQL que `database.py`. La
+galería comparte la caché y la revalidación del camino sync; el resto de la API
+sigue usando la sesión sync.
+"""
+
+import time
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from .metrics import TimedAsyncQueuePool, instrument_engine, pool_samples, record_write, register_collector
+from .profiling import profile_engine
+from .database import (
+    DATABASE_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    ASISTENCIA_INSERT_SQL,
+    ASISTENCIA_BATCH_SQL,
+    GallerySnapshot,
+    gallery_cache,
+    _asistencia_batch_plan,
+    _asistencia_batch_results,
+)
+
+
+def _async_url(url: str) -> str:
+    # psycopg 3 expone el dialecto async con el mismo nombre; aceptamos también postgresql:// a secas
+    return url.replace("postgresql://", "postgresql+psycopg://", 1) if url.startswith("postgresql://") else url
+
+
+async_engine = create_async_engine(
+    _async_url(DATABASE_URL),
+    poolclass=TimedAsyncQueuePool,
+    pool_pre_ping=True,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+instrument_engine(async_engine.sync_engine, "async")
+profile_engine(async_engine.sync_engine, "async")
+register_collector(lambda: pool_samples(async_engine.pool))
+
+
+def get_async_session() -> AsyncSession:
+    """Retorna una sesión async (usar con `async with`)."""
+    return AsyncSessionLocal()
+
+
+async def create_asistencia_async(db: AsyncSession, empleado_id: int, tipo_api: str, distancia: float, origen: str) -> Optional[int]:
+    """Registra la fichada en un solo round trip; retorna None si ya existía la del día."""
+    tipo_db = 'entrada' if tipo_api == 'ingreso' else 'salida'
+    t0 = time.perf_counter()
+    row = (await db.execute(ASISTENCIA_INSERT_SQL, {"id": empleado_id, "t": tipo_db})).first()
+    await db.commit()
+    record_write(time.perf_counter() - t0)
+    return row[0] if row is not None else None
+
+
+async def create_asistencias_batch_async(db: AsyncSession, events: Sequence[Tuple[str, int, str, datetime]]) -> List[Tuple[str, str]]:
+    params, resolved = _asistencia_batch_plan(events)
+    rows = (await db.execute(ASISTENCIA_BATCH_SQL, params)).all() if params["keys"] else []
+    await db.commit()
+    return _asistencia_batch_results(events, resolved, rows)
+
+
+async def gallery_snapshot_async() -> GallerySnapshot:
+    """Equivalente async de `gallery_cache.snapshot()`.
+
+    Vigente: se sirve sin salir del event loop. Si hay que revalidar, corre la
+    misma rutina que el camino sync (mismo lock) en el threadpool: con dos
+    rutinas y dos locks, la que terminaba última podía guardar una versión
+    más vieja que la ya cacheada.
+    """
+    if gallery_cache.is_fresh():
+        return gallery_cache.current
+    return await run_in_threadpool(gallery_cache.snapshot)
@@ -0,0 +1,66 @@
+"""Codificación binaria de embeddings (almacenamiento y wire format).
+
+- Almacenamiento: `embedding.embedding_bin` (bytea) con float32 little-endian.
+  Las filas legacy que solo tienen `embedding_data` (JSON texto) se siguen leyendo.
+- Wire format de la galería (`application/octet-stream`), todo little-endian y
+  alineado a 4 bytes para que el tótem lo envuelva en typed arrays sin parseo:
+
+    uint32[4]            count, dim, n_deleted, flags (bit 0: galería completa)
+    int32[count]         ids de empleado
+    int32[n_deleted]     ids eliminados (solo en deltas)
+    float32[count*dim]   embeddings, fila por fila
+"""
+
+import json
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+EMBEDDING_DTYPE = np.dtype("<f4")
+GALLERY_MEDIA_TYPE = "application/octet-stream"
+GALLERY_FLAG_FULL = 1
+
+
+def encode_embedding(values: Sequence[float]) -> bytes:
+    """Serializa un embedding a float32 little-endian."""
+    return np.asarray(values, dtype=EMBEDDING_DTYPE).tobytes()
+
+
+def decode_embedding(data_bin: Optional[bytes], data_text: Optional[str]) -> Optional[np.ndarray]:
+    """Lee un embedding desde la columna binaria o, si no existe, desde el JSON legacy."""
+    if data_bin:
+        return np.frombuffer(data_bin, dtype=EMBEDDING_DTYPE)
+    if data_text:
+        try:
+            return np.asarray(json.loads(data_text), dtype=EMBEDDING_DTYPE)
+        except Exception:
+            return None
+    return None
+
+
+def pack_gallery(rows: Sequence[Tuple[int, np.ndarray]], deleted: Sequence[int] = (), full: bool = True) -> bytes:
+    """Empaqueta filas (id, embedding) en el wire format binario de la galería.
+
+    Todas las filas deben compartir dimensión; se usa la mayoritaria y las
+    demás (datos legacy) van a `deleted`, así el tótem tampoco se queda con
+    una plantilla vieja de esos empleados al aplicar un delta.
+    """
+    dims: dict[int, int] = {}
+    for _, emb in rows:
+        dims[len(emb)] = dims.get(len(emb), 0) + 1
+    dim = max(dims, key=dims.get) if dims else 0
+    sel = [(eid, emb) for eid, emb in rows if len(emb) == dim]
+    if len(sel) < len(rows):
+        deleted = list(deleted)
+        seen = set(deleted)
+        deleted += [eid for eid, emb in rows if len(emb) != dim and eid not in seen]
+    header = np.array([len(sel), dim, len(deleted), GALLERY_FLAG_FULL if full else 0], dtype="<u4")
+    ids = np.array([eid for eid, _ in sel], dtype="<i4")
+    dels = np.array(list(deleted), dtype="<i4")
+    data = np.concatenate([emb for _, emb in sel]).astype(EMBEDDING_DTYPE, copy=False) if sel else np.empty(0, EMBEDDING_DTYPE)
+    return b"".join((header.tobytes(), ids.tobytes(), dels.tobytes(), data.tobytes()))
+
+
+def to_list(emb: Optional[np.ndarray]) -> Optional[List[float]]:
+    return emb.tolist() if emb is not None else None
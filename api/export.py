@@ -0,0 +1,194 @@
+"""Exportación de asistencia, producción y ventas en CSV o Parquet (streaming).
+
+Las filas se leen con un cursor del lado del servidor (`yield_per`) en bloques
+de `EXPORT_CHUNK_ROWS` y cada bloque se serializa y se entrega antes de leer el
+siguiente: la memoria del proceso no depende del tamaño de la tabla. Lo usan
+`GET /export/{dataset}` y `scripts/export_data.py`. El engine lo pasa quien
+llama: el módulo no importa `database`, así el script no arma la API entera
+(galería, cachés, métricas) para exportar.
+
+Parquet es opcional: requiere `pyarrow` (cada bloque es un row group).
+"""
+
+import io
+import os
+import csv
+from datetime import date, timedelta
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+
+EXPORT_CHUNK_ROWS = int(os.environ.get("EXPORT_CHUNK_ROWS") or os.environ.get("export_chunk_rows") or 5000)
+EXPORT_FORMATS = ("csv", "parquet")
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "parquet": "application/vnd.apache.parquet"}
+
+
+class ExportDataset:
+    """Consulta base de un dataset exportable y las columnas que la filtran."""
+
+    def __init__(self, sql: str, date_col: str, order_by: str, columns: List[Tuple[str, str]], emp_col: Optional[str] = None, ts: bool = False):
+        self.sql = sql
+        self.date_col = date_col
+        self.emp_col = emp_col
+        self.order_by = order_by
+        self.columns = columns  # (nombre, tipo): int | str | float | date | timestamp
+        self.ts = ts  # date_col es TIMESTAMP: `hasta` incluye todo ese día
+
+
+EXPORT_DATASETS = {
+    # Ordenada por empleado y fecha: recorre idx_asistencia_emp_fecha sin ordenar en disco
+    "asistencia": ExportDataset(
+        """
+        SELECT a.id_empleado, e.documento AS dni, e.nombre, e.apellido, a.fecha, a.tipo
+        FROM asistencia a
+        JOIN empleado e ON e.id_empleado = a.id_empleado
+        """,
+        date_col="a.fecha",
+        emp_col="a.id_empleado",
+        order_by="a.id_empleado, a.fecha",
+        columns=[("id_empleado", "int"), ("dni", "str"), ("nombre", "str"), ("apellido", "str"), ("fecha", "timestamp"), ("tipo", "str")],
+        ts=True,
+    ),
+    "produccion": ExportDataset(
+        """
+        SELECT pr.id_produccion, pr.fecha_prod, pr.id_empleado, e.documento AS dni, e.nombre, e.apellido,
+               pr.id_lote, l.id_producto, p.nombre AS producto,
+               pr.cantidad_out::float8 AS cantidad_out, pr.tiempo_horas::float8 AS tiempo_horas
+        FROM produccion pr
+        LEFT JOIN empleado e ON e.id_empleado = pr.id_empleado
+        LEFT JOIN lote l ON l.id_lote = pr.id_lote
+        LEFT JOIN producto p ON p.id_producto = l.id_producto
+        """,
+        date_col="pr.fecha_prod",
+        emp_col="pr.id_empleado",
+        order_by="pr.id_produccion",
+        columns=[
+            ("id_produccion", "int"), ("fecha_prod", "date"), ("id_empleado", "int"), ("dni", "str"), ("nombre", "str"),
+            ("apellido", "str"), ("id_lote", "int"), ("id_producto", "int"), ("producto", "str"),
+            ("cantidad_out", "float"), ("tiempo_horas", "float"),
+        ],
+    ),
+    "venta": ExportDataset(
+        """
+        SELECT v.id_venta, v.fecha_venta, v.id_cliente, c.nombre AS cliente, v.id_producto, p.nombre AS producto,
+               v.cantidad::float8 AS cantidad, p.precio::float8 AS precio, (v.cantidad * p.precio)::float8 AS importe
+        FROM venta v
+        LEFT JOIN cliente c ON c.id_cliente = v.id_cliente
+        LEFT JOIN producto p ON p.id_producto = v.id_producto
+        """,
+        date_col="v.fecha_venta",
+        order_by="v.id_venta",
+        columns=[
+            ("id_venta", "int"), ("fecha_venta", "date"), ("id_cliente", "int"), ("cliente", "str"), ("id_producto", "int"),
+            ("producto", "str"), ("cantidad", "float"), ("precio", "float"), ("importe", "float"),
+        ],
+    ),
+}
+
+
+def build_export_query(dataset: str, desde: Optional[date] = None, hasta: Optional[date] = None, id_empleado: Optional[int] = None):
+    """(statement, params, columnas) del dataset con los filtros pedidos; ValueError si no aplica."""
+    ds = EXPORT_DATASETS.get(dataset)
+    if ds is None:
+        raise ValueError(f"Dataset desconocido: {dataset}")
+    where: List[str] = []
+    params: dict = {}
+    # Solo los filtros presentes: así el rango usa el índice de la columna de fecha
+    if desde is not None:
+        where.append(f"{ds.date_col} >= :desde")
+        params["desde"] = desde
+    if hasta is not None:
+        where.append(f"{ds.date_col} < :hasta" if ds.ts else f"{ds.date_col} <= :hasta")
+        params["hasta"] = hasta + timedelta(days=1) if ds.ts else hasta
+    if id_empleado is not None:
+        if ds.emp_col is None:
+            raise ValueError(f"El dataset {dataset} no se filtra por empleado")
+        where.append(f"{ds.emp_col} = :id")
+        params["id"] = id_empleado
+    sql = ds.sql + (" WHERE " + " AND ".join(where) if where else "") + f" ORDER BY {ds.order_by}"
+    return text(sql), params, ds.columns
+
+
+def iter_chunks(engine: Engine, stmt, params: dict, chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[list]:
+    """Bloques de filas leídos con cursor del lado del servidor (la conexión queda tomada hasta terminar)."""
+    with engine.connect() as conn:
+        result = conn.execution_options(yield_per=chunk_rows).execute(stmt, params)
+        for part in result.partitions(chunk_rows):
+            yield part
+
+
+def stream_csv(engine: Engine, stmt, params: dict, columns, chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow([name for name, _ in columns])
+    for rows in iter_chunks(engine, stmt, params, chunk_rows):
+        writer.writerows(rows)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():  # solo encabezado: no hubo filas
+        yield buf.getvalue().encode("utf-8")
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        return None
+    return pa, pq
+
+
+def parquet_available() -> bool:
+    return _pyarrow() is not None
+
+
+class _ChunkSink(io.RawIOBase):
+    """Archivo de solo escritura que acumula bytes hasta que se los retira con `drain()`."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        data = bytes(b)
+        self._parts.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def drain(self) -> bytes:
+        out = b"".join(self._parts)
+        self._parts.clear()
+        return out
+
+
+def stream_parquet(engine: Engine, stmt, params: dict, columns, chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[bytes]:
+    pa, pq = _pyarrow()
+    types = {"int": pa.int64(), "str": pa.string(), "float": pa.float64(), "date": pa.date32(), "timestamp": pa.timestamp("us")}
+    schema = pa.schema([(name, types[kind]) for name, kind in columns])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for rows in iter_chunks(engine, stmt, params, chunk_rows):
+            cols = list(zip(*rows))
+            # write_table cierra el row group (write_batch lo acumularía hasta ~1M filas)
+            writer.write_table(pa.table([pa.array(c, type=f.type) for c, f in zip(cols, schema)], schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def stream_export(engine: Engine, stmt, params: dict, columns, fmt: str = "csv", chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[bytes]:
+    """Bytes del archivo exportado, bloque por bloque."""
+    if fmt == "parquet":
+        return stream_parquet(engine, stmt, params, columns, chunk_rows)
+    return stream_csv(engine, stmt, params, columns, chunk_rows)
@@ -0,0 +1,141 @@
+"""Liveness y readiness (`GET /livez`, `GET /readyz`).
+
+- `/livez`: el proceso responde (sin tocar la DB). Si falla, reiniciar el worker.
+- `/readyz`: el worker puede atender fichadas. Chequea la DB con timeout corto,
+  la ocupación del pool, la frescura de la galería en memoria y la latencia de
+  la última escritura de fichadas. Degradado = 503, así el balanceador (y los
+  tótems) dejan de mandarle tráfico antes de que los requests empiecen a vencer.
+
+El resultado se cachea `HEALTH_CACHE_S` segundos por proceso y un solo chequeo
+corre a la vez: cientos de tótems sondeando no suman consultas a Postgres.
+"""
+
+import os
+import time
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import text
+
+from .database import DB_POOL_SIZE, DB_MAX_OVERFLOW, GALLERY_CACHE_TTL, engine, gallery_cache
+from .metrics import last_write
+
+
+HEALTH_CACHE_S = float(os.environ.get("HEALTH_CACHE_S") or os.environ.get("health_cache_s") or 2)
+HEALTH_DB_TIMEOUT_S = float(os.environ.get("HEALTH_DB_TIMEOUT_S") or os.environ.get("health_db_timeout_s") or 1)
+# Fracción de conexiones (pool_size + max_overflow) en uso a partir de la cual el worker se declara degradado
+HEALTH_POOL_MAX = float(os.environ.get("HEALTH_POOL_MAX") or os.environ.get("health_pool_max") or 0.9)
+# Última escritura de fichadas más lenta que esto (y reciente) = degradado
+HEALTH_WRITE_MAX_MS = float(os.environ.get("HEALTH_WRITE_MAX_MS") or os.environ.get("health_write_max_ms") or 2000)
+HEALTH_WRITE_WINDOW_S = float(os.environ.get("HEALTH_WRITE_WINDOW_S") or os.environ.get("health_write_window_s") or 300)
+# Galería sin revalidar hace más de esto = degradado (0 = solo se informa: sin tráfico la galería no se revalida)
+HEALTH_GALLERY_MAX_AGE_S = float(os.environ.get("HEALTH_GALLERY_MAX_AGE_S") or os.environ.get("health_gallery_max_age_s") or 0)
+
+PING_SQL = text("SELECT 1")
+
+
+def _ping_db(out: dict):
+    t0 = time.perf_counter()
+    try:
+        with engine.connect() as conn:
+            # Timeout del lado del servidor; el de la espera lo pone join() en check_db
+            conn.execute(text(f"SET LOCAL statement_timeout = {max(1, int(HEALTH_DB_TIMEOUT_S * 1000))}"))
+            conn.execute(PING_SQL)
+            conn.rollback()
+        out["ok"] = True
+    except Exception as e:
+        out["ok"] = False
+        out["error"] = type(e).__name__
+    out["latency_ms"] = round((time.perf_counter() - t0) * 1000.0, 2)
+
+
+class HealthChecker:
+    """Chequeo de readiness cacheado y de a uno por proceso."""
+
+    def __init__(self, pools: Dict[str, object], cache_s: float = HEALTH_CACHE_S):
+        self.pools = pools
+        self.cache_s = cache_s
+        self._result: Optional[dict] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._ping: Optional[threading.Thread] = None
+
+    def check_db(self) -> dict:
+        # Un ping colgado (p. ej. esperando conexión del pool) no se relanza: cuenta como falla
+        if self._ping is not None and self._ping.is_alive():
+            return {"ok": False, "error": "ping anterior sin responder"}
+        out: dict = {}
+        self._ping = threading.Thread(target=_ping_db, args=(out,), name="health-ping", daemon=True)
+        self._ping.start()
+        self._ping.join(HEALTH_DB_TIMEOUT_S)
+        if self._ping.is_alive():
+            return {"ok": False, "error": f"timeout ({HEALTH_DB_TIMEOUT_S:g}s)"}
+        return out
+
+    def check_pools(self) -> dict:
+        capacity = DB_POOL_SIZE + max(DB_MAX_OVERFLOW, 0)
+        out = {}
+        for name, pool in self.pools.items():
+            used = pool.checkedout()
+            saturation = used / capacity if capacity else 0.0
+            out[name] = {
+                "ok": saturation < HEALTH_POOL_MAX,
+                "checked_out": used,
+                "capacity": capacity,
+                "saturation": round(saturation, 3),
+            }
+        return out
+
+    def check_gallery(self) -> dict:
+        snap = gallery_cache.current
+        age = gallery_cache.age()
+        out = {
+            "ok": True,
+            "version": snap.version if snap is not None else None,
+            "age_s": round(age, 1) if age is not None else None,
+            "stale": age is None or age > GALLERY_CACHE_TTL,
+        }
+        if HEALTH_GALLERY_MAX_AGE_S > 0:
+            out["ok"] = age is not None and age <= HEALTH_GALLERY_MAX_AGE_S
+        return out
+
+    def check_writes(self) -> dict:
+        w = last_write()
+        if w is None:
+            return {"ok": True, "latency_ms": None, "age_s": None}
+        latency_ms, age = w[0] * 1000.0, w[1]
+        # Una escritura lenta de hace mucho no describe el estado actual
+        return {
+            "ok": latency_ms <= HEALTH_WRITE_MAX_MS or age > HEALTH_WRITE_WINDOW_S,
+            "latency_ms": round(latency_ms, 2),
+            "age_s": round(age, 1),
+        }
+
+    def _run(self) -> dict:
+        checks = {
+            "db": self.check_db(),
+            "pool": self.check_pools(),
+            "gallery": self.check_gallery(),
+            "last_write": self.check_writes(),
+        }
+        ok = checks["db"]["ok"] and all(p["ok"] for p in checks["pool"].values()) and checks["gallery"]["ok"] and checks["last_write"]["ok"]
+        return {"ok": ok, "checked_at": datetime.now(timezone.utc).isoformat(), "checks": checks}
+
+    def cached(self) -> Optional[dict]:
+        """Último resultado si todavía vale (sin bloquear)."""
+        if self._result is not None and time.monotonic() - self._checked_at < self.cache_s:
+            return self._result
+        return None
+
+    def readiness(self) -> dict:
+        res = self.cached()
+        if res is not None:
+            return res
+        with self._lock:  # los probes concurrentes esperan el mismo chequeo
+            res = self.cached()
+            if res is not None:
+                return res
+            self._result = self._run()
+            self._checked_at = time.monotonic()
+            return self._result
@@ -1,7 +1,11 @@
 import os
-from fastapi import FastAPI, Depends, HTTPException, status, Query
+from datetime import date
+from typing import Literal, Optional, Union
+
+from fastapi import FastAPI, Depends, HTTPException, status, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 
 from .schemas import (
     LoginRequest,
@@ -10,9 +14,20 @@ from .schemas import (
     EmployeeOut,
     RegistrarRostroRequest,
     GalleryItem,
+    GalleryDelta,
+    MatchRequest,
+    MatchResponse,
     AsistenciaRequest,
     AsistenciaResponse,
+    AsistenciaBatchRequest,
+    AsistenciaBatchResult,
+    AsistenciaBatchResponse,
     HealthResponse,
+    BulkResponse,
+    ReportePuntualidad,
+    ReporteDesperdicio,
+    ReporteIngresos,
+    ReporteProduccion,
 )
 from .security import create_jwt, require_admin, require_api_key
 from .database import (
@@ -20,12 +35,57 @@ from .database import (
     get_session,
     create_employee,
     get_employee_by_dni,
+    get_employee_id_by_dni,
+    get_employee_role_by_dni,
+    create_employees_bulk,
+    set_embeddings_bulk,
     set_employee_embedding_by_dni,
-    get_gallery,
-    asistencia_exists_today,
+    append_employee_embedding_by_dni,
+    gallery_cache,
     create_asistencia,
+    create_asistencias_batch,
+    engine,
 )
 from .rate_limit import asistencia_limiter
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MATCH_DISTANCE, MetricsMiddleware, render as render_metrics
+from .asistencia_buffer import asistencia_buffer, DUPLICATE, UNKNOWN_EMPLOYEE
+from .embeddings import GALLERY_MEDIA_TYPE, pack_gallery
+from .bulk import parse_employees, parse_enrollments, report
+from .export import MEDIA_TYPES, build_export_query, parquet_available, stream_export
+from .health import HealthChecker
+from .responses import (
+    COMPRESS_MIN_BYTES,
+    JSON_MEDIA_TYPE,
+    CompressionMiddleware,
+    dumps,
+    encode_body,
+    json_response,
+    negotiate_encoding,
+)
+from .profiling import SQL_PROFILE, SQL_SLOW_MS, ProfilingMiddleware, query_stats
+from .reports import (
+    get_puntualidad,
+    get_desperdicio,
+    get_ingresos,
+    get_produccion,
+    refresh_reports,
+    start_reports_refresher,
+    stop_reports_refresher,
+)
+
+
+MATCH_MAX_QUERIES = 16
+# API_ASYNC=1: galería y asistencia como `async def` sobre un engine async (ver database_async.py)
+API_ASYNC = (os.environ.get("API_ASYNC") or os.environ.get("api_async") or "0") == "1"
+
+if API_ASYNC:
+    from .database_async import (
+        get_async_session,
+        gallery_snapshot_async,
+        create_asistencia_async,
+        create_asistencias_batch_async,
+        async_engine,
+    )
 
 
 def _map_db_rol_to_api(nombre: str) -> str:
@@ -61,12 +121,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Gallery-Version", "Content-Disposition", "Server-Timing"],
 )
+# Compresión por dentro de métricas: http_response_bytes_total cuenta bytes comprimidos
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
+if SQL_PROFILE:
+    app.add_middleware(ProfilingMiddleware)
 
 
 @app.on_event("startup")
 def on_startup():
     init_models()
+    start_reports_refresher()
+    if asistencia_buffer is not None:
+        asistencia_buffer.start()
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    stop_reports_refresher()
+    if asistencia_buffer is not None:
+        asistencia_buffer.stop()
 
 
 @app.post("/login", response_model=LoginResponse)
@@ -86,11 +162,10 @@ def login(data: LoginRequest):
 
     # Fallback: validar contra DB (legacy)
     with get_session() as db:
-        emp = get_employee_by_dni(db, data.dni)
-        rol_nombre = (emp or {}).get("rol_nombre", "") if emp else ""
-        if emp and (rol_nombre.lower().startswith("admin")) and (data.password == f"{emp['dni']}a"):
-            token = create_jwt(subject=data.dni, role="admin")
-            return LoginResponse(token=token)
+        emp = get_employee_role_by_dni(db, data.dni)
+    if emp and emp[1].lower().startswith("admin") and data.password == f"{emp[0]}a":
+        token = create_jwt(subject=data.dni, role="admin")
+        return LoginResponse(token=token)
 
     raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciales inválidas")
 
@@ -103,16 +178,51 @@ def create_employee_endpoint(payload: EmployeeCreate, _: dict = Depends(require_
 
     with get_session() as db:
         # DNI único
-        if get_employee_by_dni(db, payload.dni):
+        if get_employee_id_by_dni(db, payload.dni) is not None:
             raise HTTPException(status_code=409, detail="DNI ya existe")
         emp_id = create_employee(db, payload.dni, payload.nombre, payload.apellido, payload.fecha_nac, payload.rol)
         return {"id": emp_id}
 
 
+@app.post("/employees/bulk", response_model=BulkResponse)
+async def create_employees_bulk_endpoint(request: Request, _: dict = Depends(require_admin)):
+    """Alta masiva desde CSV (`text/csv`) o JSON lines, en una sola transacción; reporte por fila."""
+    body, content_type = await request.body(), request.headers.get("content-type")
+
+    # Parseo/validación (CPU) y escritura, fuera del event loop
+    def _run():
+        valid, invalid = parse_employees(body, content_type)
+        if not valid:
+            return invalid
+        with get_session() as db:
+            return create_employees_bulk(db, [(row, e.dni, e.nombre, e.apellido, e.rol) for row, e in valid]) + invalid
+
+    return report(await run_in_threadpool(_run))
+
+
+@app.post("/registrar_rostro/bulk", response_model=BulkResponse)
+async def registrar_rostro_bulk_endpoint(request: Request, _: dict = Depends(require_admin)):
+    """Registro masivo de rostro (dni + embedding) desde CSV o JSON lines; reemplaza plantillas como /registrar_rostro."""
+    body, content_type = await request.body(), request.headers.get("content-type")
+
+    def _run():
+        valid, invalid = parse_enrollments(body, content_type)
+        if not valid:
+            return invalid
+        with get_session() as db:
+            return set_embeddings_bulk(db, [(row, r.dni, r.embedding) for row, r in valid]) + invalid
+
+    return report(await run_in_threadpool(_run))
+
+
 @app.get("/employees", response_model=EmployeeOut)
-def get_employee_endpoint(dni: str = Query(...), _: dict = Depends(require_admin)):
+def get_employee_endpoint(
+    dni: str = Query(...),
+    include_embedding: bool = Query(True, description="false omite el embedding (más liviano)"),
+    _: dict = Depends(require_admin),
+):
     with get_session() as db:
-        emp = get_employee_by_dni(db, dni)
+        emp = get_employee_by_dni(db, dni, include_embedding=include_embedding)
         if not emp:
             raise HTTPException(status_code=404, detail="Empleado no encontrado")
         return EmployeeOut(
@@ -130,10 +240,10 @@ def get_employee_endpoint(dni: str = Query(...), _: dict = Depends(require_admin
 def resolve_employee_id(dni: str = Query(...), _ok=Depends(require_api_key)):
     """Devuelve {id} para un DNI. Pensado para el tótem (x-api-key), sin datos civiles."""
     with get_session() as db:
-        emp = get_employee_by_dni(db, dni)
-        if not emp:
+        emp_id = get_employee_id_by_dni(db, dni)
+        if emp_id is None:
             raise HTTPException(status_code=404, detail="Empleado no encontrado")
-        return {"id": emp["id"]}
+        return {"id": emp_id}
 
 
 @app.post("/registrar_rostro", response_model=dict)
@@ -145,24 +255,360 @@ def registrar_rostro_endpoint(payload: RegistrarRostroRequest, _: dict = Depends
         return {"ok": True}
 
 
-@app.get("/employees/gallery", response_model=list[GalleryItem])
-def gallery_endpoint(_ok=Depends(require_api_key)):
+def _gallery_etag(version: int, binary: bool = False) -> str:
+    return f'W/"gallery-{version}{"-bin" if binary else ""}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def _gallery_body(snap, since: Optional[int], binary: bool) -> bytes:
+    """Cuerpo de la galería (lista, delta o binario) serializado sin modelos Pydantic intermedios."""
+    version = snap.version
+    full = since is None or not (0 < since <= version)
+    rows, deleted = [], []
+    if full:
+        rows = snap.items()
+    elif since < version:
+        rows, deleted = snap.changes_since(since)
+    if binary:
+        return pack_gallery(rows, deleted, full=full)
+    items = [{"id": eid, "embedding": emb} for eid, emb in rows]
+    if since is None:
+        return dumps(items)
+    return dumps({"version": version, "full": full, "items": items, "deleted": deleted})
+
+
+@app.post("/registrar_rostro/append", response_model=dict)
+def registrar_rostro_append_endpoint(payload: RegistrarRostroRequest, _: dict = Depends(require_admin)):
+    """Agrega una plantilla de rostro sin borrar las anteriores (p. ej. otra iluminación).
+
+    Respeta el máximo de plantillas por empleado (EMBEDDING_MAX_TEMPLATES).
+    """
     with get_session() as db:
-        items = [GalleryItem(id=eid, embedding=emb) for eid, emb in get_gallery(db)]
-        return items
+        n = append_employee_embedding_by_dni(db, payload.dni, payload.embedding)
+        if n is None:
+            raise HTTPException(status_code=404, detail="Empleado no encontrado")
+        return {"ok": True, "templates": n}
+
+
+def _gallery_payload(snap, since: Optional[int], binary: bool, encoding: Optional[str], build: bool = True):
+    """(cuerpo, Content-Encoding aplicado) cacheados en el snapshot.
+
+    Serializar y comprimir es CPU: con `build=False` solo se consulta la caché
+    (None si falta), para que el camino async lo arme fuera del event loop.
+    """
+    # Todas las versiones completas comparten cuerpo; los deltas dependen de `since`
+    shape = "list" if since is None else ("full" if not (0 < since <= snap.version) else since)
+    key = ("bin" if binary else "json", shape)
+    body = snap.body(key, (lambda: _gallery_body(snap, since, binary)) if build else None)
+    if body is None:
+        return None
+    if encoding is None or len(body) < COMPRESS_MIN_BYTES:
+        return body, None
+    raw = body
+    body = snap.body(key + (encoding,), (lambda: encode_body(raw, encoding)) if build else None)
+    return (body, encoding) if body is not None else None
+
+
+def _gallery_request(request: Request, snap, format: Optional[str]):
+    """(binario, encoding, headers) de la respuesta, o el 304 si el ETag coincide."""
+    binary = format == "bin" or (format is None and GALLERY_MEDIA_TYPE in (request.headers.get("accept") or ""))
+    etag = _gallery_etag(snap.version, binary)
+    headers = {"ETag": etag, "X-Gallery-Version": str(snap.version), "Vary": "Accept, Accept-Encoding"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return binary, negotiate_encoding(request.headers.get("accept-encoding")), headers
+
+
+def _gallery_send(payload, binary: bool, headers: dict) -> Response:
+    body, encoding = payload
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=GALLERY_MEDIA_TYPE if binary else JSON_MEDIA_TYPE, headers=headers)
+
+
+def _gallery_response(request: Request, snap, since: Optional[int], format: Optional[str]):
+    """Galería para el tótem, con versionado.
+
+    - Sin `since`: lista completa [{id, embedding}] (contrato original).
+    - Con `since=<version>`: `GalleryDelta` solo con lo modificado desde esa versión
+      (`since=0` o una versión desconocida devuelven la galería completa con full=true).
+    - Responde 304 si `If-None-Match` coincide con el ETag de la versión actual.
+    - Con `format=bin` (o `Accept: application/octet-stream`) responde el wire format
+      binario float32 descripto en `api/embeddings.py`.
+    - El cuerpo (y su versión gzip/br según `Accept-Encoding`) se arma una vez por
+      versión de la galería y queda cacheado en el snapshot: servirlo es copiar bytes.
+    """
+    prep = _gallery_request(request, snap, format)
+    if isinstance(prep, Response):
+        return prep
+    binary, encoding, headers = prep
+    return _gallery_send(_gallery_payload(snap, since, binary, encoding), binary, headers)
+
+
+@app.post("/match", response_model=MatchResponse)
+def match_endpoint(payload: MatchRequest, _ok=Depends(require_api_key)):
+    """Top-k empleados más cercanos para uno o varios embeddings (x-api-key).
+
+    Usa la matriz normalizada de la cache de galería; cada lote de consultas se
+    resuelve con un único producto de matrices.
+    """
+    queries = payload.embeddings if payload.embeddings else ([payload.embedding] if payload.embedding else [])
+    if not queries:
+        raise HTTPException(status_code=422, detail="Falta embedding o embeddings")
+    if len(queries) > MATCH_MAX_QUERIES:
+        raise HTTPException(status_code=422, detail=f"Máximo {MATCH_MAX_QUERIES} embeddings por consulta")
+    gallery = gallery_cache.snapshot().matrix()
+    try:
+        results = gallery.search(queries, payload.k)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    for r in results:
+        if r:
+            MATCH_DISTANCE.observe(r[0][1], "match")
+    return json_response({"results": [[{"id": i, "distance": d} for i, d in r] for r in results]})
 
 
-@app.post("/asistencia", response_model=AsistenciaResponse)
-def asistencia_endpoint(payload: AsistenciaRequest, _ok=Depends(require_api_key)):
-    # Rate limit básico por empleado+tipo
-    asistencia_limiter.check((str(payload.id_empleado), payload.tipo))
+def _buffered_asistencia(payload: AsistenciaRequest) -> AsistenciaResponse:
+    """Fichada vía buffer de escritura (ASISTENCIA_BUFFER=1): se acusa antes de llegar a la DB."""
+    result = asistencia_buffer.submit(payload.id_empleado, payload.tipo)
+    if result == UNKNOWN_EMPLOYEE:
+        raise HTTPException(status_code=404, detail="Empleado no encontrado")
+    if result == DUPLICATE:
+        raise HTTPException(status_code=409, detail="Asistencia ya registrada para hoy")
+    return AsistenciaResponse(id=payload.id_empleado, queued=True)
+
+
+def _batch_events(payload: AsistenciaBatchRequest):
+    return [(e.idempotency_key, e.id_empleado, e.tipo, e.fecha) for e in payload.events]
+
+
+def _batch_response(payload: AsistenciaBatchRequest, results) -> AsistenciaBatchResponse:
+    if asistencia_buffer is not None:  # que el dedupe en memoria vea lo registrado por lote
+        for e, (_, st) in zip(payload.events, results):
+            if st in ("created", "conflict"):
+                asistencia_buffer.remember(e.id_empleado, 'entrada' if e.tipo == 'ingreso' else 'salida', e.fecha)
+    return AsistenciaBatchResponse(results=[AsistenciaBatchResult(idempotency_key=k, status=st) for k, st in results])
+
+
+@app.get("/asistencia/buffer")
+def asistencia_buffer_stats(_: dict = Depends(require_admin)):
+    """Métricas del buffer de escritura: pendientes, lotes, latencia de volcado y tamaño de lote."""
+    if asistencia_buffer is None:
+        return {"enabled": False}
+    return {"enabled": True, **asistencia_buffer.stats()}
+
+
+@app.get("/debug/queries")
+def debug_queries(
+    limit: int = Query(50, ge=1, le=500),
+    reset: bool = Query(False),
+    _: dict = Depends(require_admin),
+):
+    """Profiling de SQL del worker (SQL_PROFILE=1): sentencias por tiempo total y últimas trazas pedidas con X-Query-Trace."""
+    if not SQL_PROFILE:
+        return {"enabled": False}
+    out = {"enabled": True, "slow_ms": SQL_SLOW_MS, "statements": query_stats.top(limit), "traces": list(query_stats.traces)}
+    if reset:
+        query_stats.reset()
+    return out
+
+
+def _report_range(desde: Optional[date], hasta: Optional[date]):
+    if desde and hasta and desde > hasta:
+        raise HTTPException(status_code=422, detail="'desde' debe ser anterior o igual a 'hasta'")
+
+
+ReportRol = Optional[Literal["admin", "operario", "encargado", "seguridad"]]
+
+
+@app.get("/reports/puntualidad", response_model=ReportePuntualidad)
+def reports_puntualidad(
+    desde: Optional[date] = Query(None),
+    hasta: Optional[date] = Query(None),
+    id_empleado: Optional[int] = Query(None),
+    rol: ReportRol = Query(None),
+    _: dict = Depends(require_admin),
+):
+    """Puntualidad por empleado y mes (meses que se solapan con [desde, hasta])."""
+    _report_range(desde, hasta)
+    with get_session() as db:
+        return get_puntualidad(db, desde, hasta, id_empleado, rol)
+
+
+@app.get("/reports/desperdicio", response_model=ReporteDesperdicio)
+def reports_desperdicio(
+    desde: Optional[date] = Query(None),
+    hasta: Optional[date] = Query(None),
+    _: dict = Depends(require_admin),
+):
+    """Pérdidas por lotes vencidos, por producto y mes de vencimiento."""
+    _report_range(desde, hasta)
+    with get_session() as db:
+        return get_desperdicio(db, desde, hasta)
+
+
+@app.get("/reports/ingresos", response_model=ReporteIngresos)
+def reports_ingresos(
+    desde: Optional[date] = Query(None),
+    hasta: Optional[date] = Query(None),
+    por_producto: bool = Query(False),
+    _: dict = Depends(require_admin),
+):
+    """Ingresos por ventas por mes (o por mes y producto)."""
+    _report_range(desde, hasta)
+    with get_session() as db:
+        return get_ingresos(db, desde, hasta, por_producto)
+
+
+@app.get("/reports/produccion", response_model=ReporteProduccion)
+def reports_produccion(
+    desde: Optional[date] = Query(None),
+    hasta: Optional[date] = Query(None),
+    id_empleado: Optional[int] = Query(None),
+    rol: ReportRol = Query(None),
+    _: dict = Depends(require_admin),
+):
+    """Valor producido por empleado y mes."""
+    _report_range(desde, hasta)
     with get_session() as db:
-        if asistencia_exists_today(db, payload.id_empleado, payload.tipo):
+        return get_produccion(db, desde, hasta, id_empleado, rol)
+
+
+@app.post("/reports/refresh", response_model=dict)
+def reports_refresh(_: dict = Depends(require_admin)):
+    """Refresca ya las vistas de reportes; 409 si otro proceso está refrescando."""
+    done = refresh_reports()
+    if done is None:
+        raise HTTPException(status_code=409, detail="Refresco de reportes en curso")
+    return {"ok": True, "duracion_ms": done}
+
+
+@app.get("/export/{dataset}")
+def export_endpoint(
+    dataset: Literal["asistencia", "produccion", "venta"],
+    format: Literal["csv", "parquet"] = Query("csv"),
+    desde: Optional[date] = Query(None),
+    hasta: Optional[date] = Query(None),
+    id_empleado: Optional[int] = Query(None),
+    _: dict = Depends(require_admin),
+):
+    """Descarga del dataset en streaming (memoria constante); ver api/export.py."""
+    _report_range(desde, hasta)
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=501, detail="Exportar Parquet requiere pyarrow en el backend")
+    try:
+        stmt, params, columns = build_export_query(dataset, desde, hasta, id_empleado)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    name = "_".join([dataset] + [d.isoformat() for d in (desde, hasta) if d]) + "." + format
+    return StreamingResponse(
+        stream_export(engine, stmt, params, columns, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{name}"'},
+    )
+
+
+# Camino caliente del tótem (galería y asistencia): sync (threadpool) o async según API_ASYNC
+if API_ASYNC:
+    @app.get("/employees/gallery", response_model=Union[list[GalleryItem], GalleryDelta])
+    async def gallery_endpoint(
+        request: Request,
+        since: Optional[int] = Query(None, ge=0),
+        format: Optional[Literal["json", "bin"]] = Query(None),
+        _ok=Depends(require_api_key),
+    ):
+        """Galería para el tótem (x-api-key); ver `_gallery_response`."""
+        snap = await gallery_snapshot_async()
+        prep = _gallery_request(request, snap, format)
+        if isinstance(prep, Response):
+            return prep
+        binary, encoding, headers = prep
+        # Cuerpo ya cacheado: copia de bytes; si no, se serializa/comprime en el threadpool
+        payload = _gallery_payload(snap, since, binary, encoding, build=False)
+        if payload is None:
+            payload = await run_in_threadpool(_gallery_payload, snap, since, binary, encoding)
+        return _gallery_send(payload, binary, headers)
+
+    @app.post("/asistencia", response_model=AsistenciaResponse)
+    async def asistencia_endpoint(payload: AsistenciaRequest, _ok=Depends(require_api_key)):
+        MATCH_DISTANCE.observe(payload.distancia, "asistencia")
+        # Rate limit básico por empleado+tipo
+        await asistencia_limiter.acheck((str(payload.id_empleado), payload.tipo))
+        if asistencia_buffer is not None:
+            return await run_in_threadpool(_buffered_asistencia, payload)  # fsync del spool fuera del event loop
+        async with get_async_session() as db:
+            new_id = await create_asistencia_async(db, payload.id_empleado, payload.tipo, payload.distancia, payload.origen)
+        if new_id is None:
+            raise HTTPException(status_code=409, detail="Asistencia ya registrada para hoy")
+        return AsistenciaResponse(id=new_id)
+
+    @app.post("/asistencia/batch", response_model=AsistenciaBatchResponse)
+    async def asistencia_batch_endpoint(payload: AsistenciaBatchRequest, _ok=Depends(require_api_key)):
+        """Fichadas acumuladas offline por el tótem, en un solo round trip; ver `AsistenciaBatchResult`."""
+        async with get_async_session() as db:
+            results = await create_asistencias_batch_async(db, _batch_events(payload))
+        return _batch_response(payload, results)
+else:
+    @app.get("/employees/gallery", response_model=Union[list[GalleryItem], GalleryDelta])
+    def gallery_endpoint(
+        request: Request,
+        since: Optional[int] = Query(None, ge=0),
+        format: Optional[Literal["json", "bin"]] = Query(None),
+        _ok=Depends(require_api_key),
+    ):
+        """Galería para el tótem (x-api-key); ver `_gallery_response`."""
+        return _gallery_response(request, gallery_cache.snapshot(), since, format)
+
+    @app.post("/asistencia", response_model=AsistenciaResponse)
+    def asistencia_endpoint(payload: AsistenciaRequest, _ok=Depends(require_api_key)):
+        MATCH_DISTANCE.observe(payload.distancia, "asistencia")
+        # Rate limit básico por empleado+tipo
+        asistencia_limiter.check((str(payload.id_empleado), payload.tipo))
+        if asistencia_buffer is not None:
+            return _buffered_asistencia(payload)
+        with get_session() as db:
+            new_id = create_asistencia(db, payload.id_empleado, payload.tipo, payload.distancia, payload.origen)
+        if new_id is None:
             raise HTTPException(status_code=409, detail="Asistencia ya registrada para hoy")
-        new_id = create_asistencia(db, payload.id_empleado, payload.tipo, payload.distancia, payload.origen)
         return AsistenciaResponse(id=new_id)
 
+    @app.post("/asistencia/batch", response_model=AsistenciaBatchResponse)
+    def asistencia_batch_endpoint(payload: AsistenciaBatchRequest, _ok=Depends(require_api_key)):
+        """Fichadas acumuladas offline por el tótem, en un solo round trip; ver `AsistenciaBatchResult`."""
+        with get_session() as db:
+            results = create_asistencias_batch(db, _batch_events(payload))
+        return _batch_response(payload, results)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    """Métricas del worker en formato de texto Prometheus (ver api/metrics.py)."""
+    return PlainTextResponse(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
+health = HealthChecker({"sync": engine.pool, **({"async": async_engine.pool} if API_ASYNC else {})})
+
 
 @app.get("/healthz", response_model=HealthResponse)
 def health_check():
+    """Compatibilidad (warmup del tótem): igual que /livez."""
     return HealthResponse()
+
+
+@app.get("/livez", response_model=HealthResponse)
+async def liveness():
+    """El proceso responde; async para no depender del threadpool ni de la DB."""
+    return HealthResponse()
+
+
+@app.get("/readyz")
+async def readiness():
+    """Estado de DB, pool, galería y escrituras (cacheado, ver api/health.py); 503 si está degradado."""
+    result = health.cached() or await run_in_threadpool(health.readiness)
+    return JSONResponse(result, status_code=status.HTTP_200_OK if result["ok"] else status.HTTP_503_SERVICE_UNAVAILABLE)
@@ -0,0 +1,136 @@
+"""Matching facial vectorizado del lado del servidor.
+
+La galería se representa como una matriz float32 con filas normalizadas (L2),
+construida una vez por versión desde `database.gallery_cache`. Así, la
+distancia coseno contra todos los empleados es un único producto matriz-vector
+(o matriz-matriz para consultas en lote).
+"""
+
+import os
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .ann import IVFIndex, build_ivf
+
+
+# Índice aproximado (IVF) opcional; por debajo de MATCH_ANN_MIN_SIZE filas la búsqueda es exacta
+MATCH_ANN = (os.environ.get("MATCH_ANN") or os.environ.get("match_ann") or "0") == "1"
+MATCH_ANN_MIN_SIZE = int(os.environ.get("MATCH_ANN_MIN_SIZE") or os.environ.get("match_ann_min_size") or 5000)
+MATCH_ANN_NLIST = int(os.environ.get("MATCH_ANN_NLIST") or os.environ.get("match_ann_nlist") or 0)
+MATCH_ANN_NPROBE = int(os.environ.get("MATCH_ANN_NPROBE") or os.environ.get("match_ann_nprobe") or 8)
+
+
+def _l2_normalize(m: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return m / norms
+
+
+class GalleryMatrix:
+    """Galería como matriz (N, d) float32 normalizada + vector de ids (N,).
+
+    Un empleado puede tener varias plantillas (filas con el mismo id); las
+    búsquedas devuelven cada empleado una sola vez, con su mejor distancia.
+    """
+
+    def __init__(self, ids: np.ndarray, matrix: np.ndarray, ann: Optional[IVFIndex] = None, ann_assign: Optional[dict] = None):
+        self.ids = ids
+        self.matrix = matrix
+        self.ann = ann
+        self.ann_assign = ann_assign
+        counts = np.unique(ids, return_counts=True)[1] if ids.size else np.empty(0, dtype=np.int64)
+        self.max_templates = int(counts.max()) if counts.size else 1
+        # Búsqueda exacta con plantillas: filas ordenadas por id, `groups` = inicio de cada empleado
+        self.groups = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]]) if self.max_templates > 1 and ann is None else None
+
+    @property
+    def size(self) -> int:
+        return int(self.ids.shape[0])
+
+    @property
+    def dim(self) -> Optional[int]:
+        return int(self.matrix.shape[1]) if self.size else None
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: Sequence[Tuple[int, Sequence[float]]],
+        previous: Optional["GalleryMatrix"] = None,
+        changed: Optional[set] = None,
+        ann: Optional[bool] = None,
+        nprobe: Optional[int] = None,
+    ) -> "GalleryMatrix":
+        """Construye la matriz desde filas (id, embedding) como las de `get_gallery`.
+
+        Si hay embeddings de distinta dimensión (datos legacy), se usa la
+        dimensión mayoritaria y se descartan los demás.
+
+        Con ANN activo (`MATCH_ANN=1` y al menos `MATCH_ANN_MIN_SIZE` filas) se
+        arma además un índice IVF; si `previous` ya tenía uno, se reutilizan sus
+        centroides y solo se reasignan los ids en `changed` o nuevos. `ann`
+        True/False fuerza IVF o búsqueda exacta sin mirar la configuración.
+        """
+        dims: dict[int, int] = {}
+        for _, emb in rows:
+            if len(emb):
+                dims[len(emb)] = dims.get(len(emb), 0) + 1
+        if not dims:
+            return cls(np.empty((0,), dtype=np.int64), np.empty((0, 0), dtype=np.float32))
+        dim = max(dims, key=dims.get)
+        sel = [(eid, emb) for eid, emb in rows if len(emb) == dim]
+        ids = np.fromiter((eid for eid, _ in sel), dtype=np.int64, count=len(sel))
+        matrix = _l2_normalize(np.asarray([emb for _, emb in sel], dtype=np.float32))
+        use_ann = (MATCH_ANN and len(sel) >= MATCH_ANN_MIN_SIZE) if ann is None else ann
+        if not use_ann:
+            order = np.argsort(ids, kind="stable")
+            return cls(ids[order], matrix[order])
+        nlist = MATCH_ANN_NLIST or max(1, int(4 * np.sqrt(len(sel))))
+        prev_ann = previous.ann if previous is not None else None
+        prev_assign = previous.ann_assign if previous is not None else None
+        index, order, by_id = build_ivf(matrix, ids, min(nlist, len(sel)), nprobe or MATCH_ANN_NPROBE, prev_ann, prev_assign, changed)
+        # Filas ordenadas por celda: cada celda es un bloque contiguo de la matriz
+        return cls(ids[order], matrix[order], index, by_id)
+
+    def search(self, queries: Sequence[Sequence[float]], k: int = 1) -> List[List[Tuple[int, float]]]:
+        """Top-k (id, distancia coseno) por consulta, ordenados de menor a mayor distancia.
+
+        Lanza ValueError si la dimensión de las consultas no coincide con la galería.
+        """
+        q = np.asarray(queries, dtype=np.float32)
+        if q.ndim != 2:
+            raise ValueError("Las consultas deben ser una lista de embeddings")
+        if not self.size:
+            return [[] for _ in range(q.shape[0])]
+        if q.shape[1] != self.dim:
+            raise ValueError(f"Dimensión de embedding inválida: {q.shape[1]} (esperada {self.dim})")
+        if self.ann is not None:
+            out: List[List[Tuple[int, float]]] = []
+            # Se piden candidatos de más para poder quedarse con la mejor plantilla de k empleados
+            for rows, dists in self.ann.search(self.matrix, _l2_normalize(q), k * self.max_templates):
+                seen: set = set()
+                best: List[Tuple[int, float]] = []
+                for j, d in zip(rows, dists):
+                    eid = int(self.ids[j])
+                    if eid not in seen:
+                        seen.add(eid)
+                        best.append((eid, float(min(max(d, 0.0), 2.0))))
+                out.append(best[:k])
+            return out
+        dist = 1.0 - _l2_normalize(q) @ self.matrix.T  # (n_queries, N)
+        np.clip(dist, 0.0, 2.0, out=dist)
+        ids = self.ids
+        if self.groups is not None:
+            dist = np.minimum.reduceat(dist, self.groups, axis=1)
+            ids = ids[self.groups]
+        n = ids.shape[0]
+        k = min(k, n)
+        if k < n:
+            top = np.argpartition(dist, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(n), dist.shape)
+        out = []
+        for row, cand in zip(dist, top):
+            cand = cand[np.argsort(row[cand], kind="stable")]
+            out.append([(int(ids[j]), float(row[j])) for j in cand])
+        return out
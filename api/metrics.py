@@ -0,0 +1,298 @@
+"""Métricas en formato de texto Prometheus (`GET /metrics`).
+
+Sin dependencias externas: contadores, gauges e histogramas mínimos, seguros
+entre threads. Las métricas son por proceso (con varios workers, cada uno
+expone las suyas; Prometheus las agrega por instancia).
+
+- `MetricsMiddleware`: requests por ruta/estado, latencia, en curso, bytes
+  respondidos y consultas SQL por request.
+- `TimedQueuePool` / `TimedAsyncQueuePool`: espera para obtener una conexión.
+- `instrument_engine`: cuenta las consultas de un engine.
+- `register_collector`: valores que se leen al momento del scrape (pool,
+  galería, buffer de asistencias).
+- `record_write` / `last_write`: latencia de la última escritura de fichadas
+  exitosa (también la usa `/readyz`).
+"""
+
+import time
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_registry: List["_Metric"] = []
+_collectors: List[Callable[[], Iterable[Tuple[str, str, str, List[Tuple[dict, float]]]]]] = []
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    def esc(v: str) -> str:
+        return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    return "{" + ",".join(f'{n}="{esc(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _fmt(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {} if labels else {(): 0.0}
+
+    def inc(self, *labelvalues: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        return self._values.get(labelvalues, 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, k)} {_fmt(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, *labelvalues: str):
+        with self._lock:
+            self._values[labelvalues] = value
+
+    def dec(self, *labelvalues: str, amount: float = 1.0):
+        self.inc(*labelvalues, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], list] = {}  # labels -> [conteo por bucket (+Inf al final), suma]
+
+    def observe(self, value: float, *labelvalues: str):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(labelvalues)
+            if s is None:
+                s = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            s[0][i] += 1
+            s[1] += value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(c), total) for k, (c, total) in self._series.items()]
+        out: List[str] = []
+        names = self.labelnames + ("le",)
+        for k, counts, total in items:
+            acc = 0
+            for b, c in zip(self.buckets + (float("inf"),), counts):
+                acc += c
+                out.append(f"{self.name}_bucket{_labels(names, k + (_fmt(b),))} {acc}")
+            out.append(f"{self.name}_sum{_labels(self.labelnames, k)} {_fmt(total)}")
+            out.append(f"{self.name}_count{_labels(self.labelnames, k)} {acc}")
+        return out
+
+
+def register_collector(fn: Callable[[], Iterable[Tuple[str, str, str, List[Tuple[dict, float]]]]]):
+    """fn() -> [(nombre, tipo, ayuda, [(labels, valor)])], evaluada en cada scrape."""
+    _collectors.append(fn)
+    return fn
+
+
+def render() -> str:
+    lines: List[str] = []
+    for m in _registry:
+        lines.extend(m.render())
+    # Varios collectors pueden aportar a la misma familia (p. ej. el pool sync y el async):
+    # HELP/TYPE deben salir una sola vez, con todas sus muestras juntas
+    families: Dict[str, Tuple[str, str, List[Tuple[dict, float]]]] = {}
+    for fn in _collectors:
+        try:
+            collected = list(fn())
+        except Exception:  # un collector roto no debe tirar /metrics
+            continue
+        for name, kind, help, samples in collected:
+            if name not in families:
+                families[name] = (kind, help, [])
+            families[name][2].extend(samples)
+    for name, (kind, help, samples) in families.items():
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            if value is None:
+                continue
+            lines.append(f"{name}{_labels(tuple(labels), tuple(labels.values()))} {_fmt(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# HTTP
+HTTP_REQUESTS = Counter("http_requests_total", "Requests HTTP atendidos.", ("method", "route", "status"))
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "Latencia de los requests HTTP.", ("method", "route"))
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests HTTP en curso.")
+HTTP_RESPONSE_BYTES = Counter("http_response_bytes_total", "Bytes de cuerpo respondidos.", ("method", "route"))
+# DB
+DB_QUERIES = Counter("db_queries_total", "Sentencias SQL ejecutadas.", ("engine",))
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request", "Sentencias SQL por request HTTP.", ("route",), buckets=(0, 1, 2, 3, 5, 10, 20, 50)
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Espera para obtener una conexión del pool.", ("engine",),
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+# Dominio
+RATE_LIMIT_REJECTIONS = Counter("rate_limit_rejections_total", "Eventos rechazados por rate limit.", ("scope",))
+# source="match": mejor candidato de /match; source="asistencia": distancia informada por el tótem al fichar
+MATCH_DISTANCE = Histogram(
+    "match_distance", "Distancia coseno del reconocimiento.", ("source",),
+    buckets=(0.1, 0.2, 0.3, 0.35, 0.4, 0.5, 0.6, 0.8, 1.0, 2.0),
+)
+
+
+_last_write: Optional[Tuple[float, float]] = None  # (segundos que tardó, instante monotonic)
+
+
+def record_write(seconds: float):
+    """Registra una escritura de fichadas confirmada (commit incluido)."""
+    global _last_write
+    _last_write = (seconds, time.monotonic())
+
+
+def last_write() -> Optional[Tuple[float, float]]:
+    """(latencia en segundos, antigüedad en segundos) de la última escritura, o None."""
+    w = _last_write
+    return (w[0], time.monotonic() - w[1]) if w is not None else None
+
+
+@register_collector
+def _write_metrics():
+    w = last_write()
+    if w is None:
+        return []
+    return [
+        ("db_last_write_seconds", "gauge", "Latencia de la última escritura de fichadas.", [({}, w[0])]),
+        ("db_last_write_age_seconds", "gauge", "Segundos desde la última escritura de fichadas.", [({}, w[1])]),
+    ]
+
+
+class _RequestStats:
+    __slots__ = ("queries",)
+
+    def __init__(self):
+        self.queries = 0
+
+
+# Objeto mutable: los endpoints sync corren en el threadpool con una copia del contexto
+_request_stats: ContextVar[Optional[_RequestStats]] = ContextVar("request_stats", default=None)
+
+
+class MetricsMiddleware:
+    """Middleware ASGI puro (sin BaseHTTPMiddleware: no bufferiza ni agrega una tarea por request)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status_code = 500
+        nbytes = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, nbytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                nbytes += len(message.get("body", b""))
+            await send(message)
+
+        stats = _RequestStats()
+        token = _request_stats.set(stats)
+        HTTP_IN_FLIGHT.inc()
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - t0
+            HTTP_IN_FLIGHT.dec()
+            _request_stats.reset(token)
+            # Plantilla de la ruta (p. ej. /export/{dataset}), no el path: cardinalidad acotada
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_REQUESTS.inc(method, route, str(status_code))
+            HTTP_LATENCY.observe(elapsed, method, route)
+            HTTP_RESPONSE_BYTES.inc(method, route, amount=nbytes)
+            DB_QUERIES_PER_REQUEST.observe(stats.queries, route)
+
+
+def instrument_engine(sync_engine, name: str):
+    """Cuenta las sentencias del engine (total y por request en curso)."""
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        DB_QUERIES.inc(name)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+
+
+class _TimedPoolMixin:
+    metrics_name = "sync"
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - t0, self.metrics_name)
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    """QueuePool que registra cuánto espera cada checkout (incluye abrir conexiones nuevas)."""
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    metrics_name = "async"
+
+
+def pool_samples(pool) -> List[Tuple[str, str, str, List[Tuple[dict, float]]]]:
+    """Ocupación actual de un QueuePool, para un collector."""
+    name = getattr(pool, "metrics_name", "sync")
+    lbl = {"engine": name}
+    return [
+        ("db_pool_size", "gauge", "Conexiones permanentes del pool.", [(lbl, pool.size())]),
+        ("db_pool_checked_out", "gauge", "Conexiones en uso.", [(lbl, pool.checkedout())]),
+        ("db_pool_overflow", "gauge", "Conexiones por encima de pool_size (negativo: aún sin abrir).", [(lbl, pool.overflow())]),
+        ("db_pool_checked_in", "gauge", "Conexiones libres en el pool.", [(lbl, pool.checkedin())]),
+    ]
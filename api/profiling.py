@@ -0,0 +1,236 @@
+"""Profiling de SQL opcional (`SQL_PROFILE=1`).
+
+Con eventos del engine registra, por sentencia: duración, filas y la función
+de dominio que la ejecutó (`database.get_gallery`, `database.create_asistencia`,
+...). Con eso se ve qué consulta pesa y desde dónde sin leer todo el código.
+
+- Estadística acumulada por (función, sentencia): `GET /debug/queries`.
+- Log de consultas lentas (más de `SQL_SLOW_MS`); con `SQL_EXPLAIN=1` se
+  agrega el plan (`EXPLAIN`, sin ANALYZE: no vuelve a ejecutar), una vez por
+  sentencia.
+- Traza por request: con el header `X-Query-Trace: 1` (o `explain`, que suma el
+  plan de cada consulta) la lista de consultas del request se loguea y queda
+  entre las últimas trazas de `/debug/queries`. Todos los requests llevan
+  `Server-Timing: db;dur=<ms>;desc="<n> queries"`.
+
+Apagado (default) no registra eventos ni agrega middleware: costo cero.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import logging
+import threading
+from collections import deque
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+
+logger = logging.getLogger(__name__)
+
+SQL_PROFILE = (os.environ.get("SQL_PROFILE") or os.environ.get("sql_profile") or "0") == "1"
+SQL_SLOW_MS = float(os.environ.get("SQL_SLOW_MS") or os.environ.get("sql_slow_ms") or 100)
+SQL_EXPLAIN = (os.environ.get("SQL_EXPLAIN") or os.environ.get("sql_explain") or "0") == "1"
+SQL_TRACE_KEEP = int(os.environ.get("SQL_TRACE_KEEP") or os.environ.get("sql_trace_keep") or 50)
+TRACE_HEADER = b"x-query-trace"
+
+_EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH|INSERT|UPDATE|DELETE)\b", re.IGNORECASE)
+_SPACES = re.compile(r"\s+")
+# Módulos del paquete que no cuentan como "dominio" al buscar quién ejecutó la consulta
+_PKG = __name__.rpartition(".")[0]
+_SKIP_MODULES = (__name__, f"{_PKG}.metrics")
+
+
+def _normalize(statement: str) -> str:
+    return _SPACES.sub(" ", statement).strip()
+
+
+def _domain_name(f) -> Optional[str]:
+    mod = f.f_globals.get("__name__", "")
+    if mod.startswith(_PKG + ".") and mod not in _SKIP_MODULES:
+        return f"{mod.rpartition('.')[2]}.{getattr(f.f_code, 'co_qualname', f.f_code.co_name)}"
+    return None
+
+
+def _parent_greenlet_frame():
+    """Frame suspendido del greenlet padre (engine async: ahí quedó la corrutina que hizo el `await`)."""
+    try:
+        from greenlet import getcurrent
+    except ImportError:
+        return None
+    parent = getcurrent().parent
+    return parent.gr_frame if parent is not None else None
+
+
+def _caller() -> str:
+    """Función más interna del paquete `api` que ejecutó la consulta (p. ej. `database.get_gallery`)."""
+    # Engine async: la consulta corre en un greenlet aparte; la pila de dominio es la del padre
+    for f in (sys._getframe(2), _parent_greenlet_frame()):
+        while f is not None:
+            name = _domain_name(f)
+            if name is not None:
+                return name
+            f = f.f_back
+    return "?"
+
+
+class QueryStats:
+    """Acumulado por (función, sentencia): cantidad, tiempo total/máximo y filas."""
+
+    def __init__(self):
+        self._stats: Dict[Tuple[str, str], list] = {}  # -> [n, total_ms, max_ms, filas]
+        self._plans: Dict[str, str] = {}  # sentencia -> plan (EXPLAIN una sola vez)
+        self.traces: deque = deque(maxlen=SQL_TRACE_KEEP)
+        self._lock = threading.Lock()
+
+    def add(self, caller: str, statement: str, ms: float, rows: int):
+        with self._lock:
+            s = self._stats.get((caller, statement))
+            if s is None:
+                s = self._stats[(caller, statement)] = [0, 0.0, 0.0, 0]
+            s[0] += 1
+            s[1] += ms
+            s[2] = max(s[2], ms)
+            s[3] += max(rows, 0)
+
+    def plan(self, statement: str) -> Optional[str]:
+        return self._plans.get(statement)
+
+    def set_plan(self, statement: str, plan: str):
+        self._plans[statement] = plan
+
+    def top(self, limit: int = 50) -> List[dict]:
+        with self._lock:
+            items = sorted(self._stats.items(), key=lambda kv: kv[1][1], reverse=True)[:limit]
+        return [
+            {
+                "caller": caller,
+                "statement": statement,
+                "calls": n,
+                "total_ms": round(total, 3),
+                "mean_ms": round(total / n, 3),
+                "max_ms": round(mx, 3),
+                "rows": rows,
+                "plan": self._plans.get(statement),
+            }
+            for (caller, statement), (n, total, mx, rows) in items
+        ]
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._plans.clear()
+            self.traces.clear()
+
+
+query_stats = QueryStats()
+
+
+class _Trace:
+    __slots__ = ("queries", "count", "db_ms", "keep", "explain")
+
+    def __init__(self, keep: bool, explain: bool):
+        self.queries: List[dict] = []
+        self.count = 0
+        self.db_ms = 0.0
+        self.keep = keep
+        self.explain = explain
+
+
+_trace: ContextVar[Optional[_Trace]] = ContextVar("query_trace", default=None)
+
+
+def _explain(conn, statement: str, parameters) -> Optional[str]:
+    # Cursor DBAPI directo: no vuelve a disparar los eventos del engine
+    try:
+        cur = conn.connection.cursor()
+        try:
+            cur.execute("EXPLAIN " + statement, parameters)
+            return "\n".join(r[0] for r in cur.fetchall())
+        finally:
+            cur.close()
+    except Exception as e:
+        return f"(EXPLAIN falló: {type(e).__name__}: {e})"
+
+
+def profile_engine(sync_engine, name: str):
+    """Registra los eventos de profiling en el engine (no hace nada si SQL_PROFILE está apagado)."""
+    if not SQL_PROFILE:
+        return
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("profiling_t0", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        ms = (time.perf_counter() - conn.info["profiling_t0"].pop()) * 1000.0
+        rows = cursor.rowcount if cursor.rowcount is not None else -1
+        caller = _caller()
+        key = _normalize(statement)
+        query_stats.add(caller, key, ms, rows)
+        trace = _trace.get()
+        slow = ms >= SQL_SLOW_MS
+        plan = None
+        explainable = not executemany and _EXPLAINABLE.match(statement) is not None
+        if explainable and ((slow and SQL_EXPLAIN) or (trace is not None and trace.explain)):
+            plan = query_stats.plan(key)
+            if plan is None:
+                plan = _explain(conn, statement, parameters)
+                query_stats.set_plan(key, plan)
+        if slow:
+            logger.warning(
+                "SQL lenta [%s] %.1f ms, %d filas, en %s: %s%s",
+                name, ms, rows, caller, key[:500], ("\n" + plan) if plan else "",
+            )
+        if trace is not None:
+            trace.count += 1
+            trace.db_ms += ms
+            if trace.keep:
+                entry = {"engine": name, "caller": caller, "ms": round(ms, 3), "rows": rows, "statement": key}
+                if plan is not None:
+                    entry["plan"] = plan
+                trace.queries.append(entry)
+
+
+class ProfilingMiddleware:
+    """Abre una traza por request, agrega `Server-Timing` y guarda/loguea la traza pedida por header."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        mode = dict(scope["headers"]).get(TRACE_HEADER, b"").decode().lower()
+        trace = _Trace(keep=mode in ("1", "true", "explain"), explain=mode == "explain")
+        t0 = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", f'db;dur={trace.db_ms:.1f};desc="{trace.count} queries"'.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _trace.set(trace)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _trace.reset(token)
+            if trace.keep:
+                route = getattr(scope.get("route"), "path", None) or scope["path"]
+                record = {
+                    "method": scope["method"],
+                    "route": route,
+                    "path": scope["path"],
+                    "total_ms": round((time.perf_counter() - t0) * 1000.0, 3),
+                    "db_ms": round(trace.db_ms, 3),
+                    "queries": trace.queries,
+                }
+                query_stats.traces.append(record)
+                logger.info("Traza SQL %s %s: %s", scope["method"], scope["path"], json.dumps(record, ensure_ascii=False, default=str))
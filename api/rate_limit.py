@@ -1,26 +1,145 @@
+"""Rate limiting con backend intercambiable (`RATE_LIMIT_BACKEND`).
+
+- `memory` (default): token bucket por proceso, O(1) por chequeo, con memoria
+  acotada: las claves se guardan en orden LRU y al superar `RATE_LIMIT_MAX_KEYS`
+  se descartan las inactivas hace más de una ventana (ya tienen el bucket
+  lleno, así que descartarlas no cambia el resultado). Si las más viejas
+  siguen activas no se descarta nada: el mapa crece temporalmente en lugar
+  de regalarle una ráfaga nueva a una clave que agotó sus tokens.
+- `postgres`: el mismo token bucket en una tabla UNLOGGED compartida por todos
+  los workers (un UPSERT por chequeo). Si la DB falla, deja pasar (fail open)
+  y lo registra en el log.
+"""
+
+import os
 import time
-from collections import defaultdict, deque
+import random
+import logging
+import threading
+from collections import OrderedDict
 from typing import Tuple
+
 from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+
+from .metrics import RATE_LIMIT_REJECTIONS
+
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_BACKEND = (os.environ.get("RATE_LIMIT_BACKEND") or os.environ.get("rate_limit_backend") or "memory").lower()
+RATE_LIMIT_MAX_KEYS = int(os.environ.get("RATE_LIMIT_MAX_KEYS") or os.environ.get("rate_limit_max_keys") or 100_000)
 
 
-class RateLimiter:
-    def __init__(self, max_events: int, window_seconds: float):
+def _too_many(scope: str) -> HTTPException:
+    RATE_LIMIT_REJECTIONS.inc(scope)
+    return HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Rate limit excedido")
+
+
+class TokenBucketLimiter:
+    """Token bucket en memoria: `max_events` de ráfaga, recarga de max_events/window por segundo."""
+
+    def __init__(self, max_events: int, window_seconds: float, max_keys: int = RATE_LIMIT_MAX_KEYS, scope: str = "default"):
         self.max_events = max_events
         self.window = window_seconds
-        self.events = defaultdict(lambda: deque())
+        self.rate = max_events / window_seconds
+        self.max_keys = max_keys
+        self.scope = scope
+        self.buckets: "OrderedDict[Tuple[str, ...], list]" = OrderedDict()  # clave -> [tokens, último instante]
+        self.clock = time.monotonic
+        self._lock = threading.Lock()
+
+    def _evict(self, now: float):
+        # Orden LRU: la primera es la de último chequeo más viejo; se corta en la primera activa
+        while len(self.buckets) > self.max_keys:
+            oldest = next(iter(self.buckets.values()))
+            if now - oldest[1] < self.window:
+                return
+            self.buckets.popitem(last=False)
+
+    def allow(self, key: Tuple[str, ...]) -> bool:
+        now = self.clock()
+        with self._lock:
+            b = self.buckets.get(key)
+            if b is None:
+                self.buckets[key] = [self.max_events - 1.0, now]
+                self._evict(now)
+                return True
+            self.buckets.move_to_end(key)
+            tokens = b[0] + (now - b[1]) * self.rate
+            if tokens > self.max_events:
+                tokens = self.max_events
+            b[1] = now
+            if tokens < 1.0:
+                b[0] = tokens
+                return False
+            b[0] = tokens - 1.0
+            return True
 
     def check(self, key: Tuple[str, ...]):
-        now = time.time()
-        q = self.events[key]
-        # purge old
-        while q and now - q[0] > self.window:
-            q.popleft()
-        if len(q) >= self.max_events:
-            raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Rate limit excedido")
-        q.append(now)
+        if not self.allow(key):
+            raise _too_many(self.scope)
+
+    async def acheck(self, key: Tuple[str, ...]):
+        self.check(key)  # O(1) y sin I/O: no hace falta salir del event loop
+
+
+# Sin recarga negativa: si no alcanza el token, el WHERE evita el UPDATE y no vuelve fila
+PG_BUCKET_SQL = text(
+    """
+    INSERT INTO rate_limit_bucket AS b (clave, tokens, actualizado)
+    VALUES (:k, :cap - 1, clock_timestamp())
+    ON CONFLICT (clave) DO UPDATE
+      SET tokens = LEAST(:cap, b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.actualizado) * :rate) - 1,
+          actualizado = clock_timestamp()
+      WHERE LEAST(:cap, b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.actualizado) * :rate) >= 1
+    RETURNING tokens
+    """
+)
+PG_PURGE_SQL = text("DELETE FROM rate_limit_bucket WHERE actualizado < clock_timestamp() - make_interval(secs => :idle)")
+
+
+class PostgresRateLimiter:
+    """Token bucket compartido entre workers en `rate_limit_bucket` (ver pg_migrations.sql)."""
+
+    PURGE_EVERY = 1000  # cada ~N chequeos se borran buckets inactivos (ya estarían llenos)
+
+    def __init__(self, max_events: int, window_seconds: float, scope: str):
+        self.max_events = max_events
+        self.window = window_seconds
+        self.rate = max_events / window_seconds
+        self.scope = scope
+
+    def allow(self, key: Tuple[str, ...]) -> bool:
+        from .database import engine
+
+        k = ":".join((self.scope,) + tuple(key))
+        try:
+            with engine.begin() as conn:
+                row = conn.execute(PG_BUCKET_SQL, {"k": k, "cap": float(self.max_events), "rate": self.rate}).first()
+                if random.randrange(self.PURGE_EVERY) == 0:
+                    conn.execute(PG_PURGE_SQL, {"idle": self.window})
+            return row is not None
+        except Exception:
+            logger.warning("Rate limit compartido no disponible; se permite el evento", exc_info=True)
+            return True
+
+    def check(self, key: Tuple[str, ...]):
+        if not self.allow(key):
+            raise _too_many(self.scope)
+
+    async def acheck(self, key: Tuple[str, ...]):
+        if not await run_in_threadpool(self.allow, key):  # round trip a la DB fuera del event loop
+            raise _too_many(self.scope)
+
 
+def make_limiter(max_events: int, window_seconds: float, scope: str):
+    """Limiter según `RATE_LIMIT_BACKEND`; `scope` separa los buckets de cada uso en la tabla compartida."""
+    if RATE_LIMIT_BACKEND == "postgres":
+        return PostgresRateLimiter(max_events, window_seconds, scope)
+    return TokenBucketLimiter(max_events, window_seconds, scope=scope)
 
-# Para /asistencia: máx 4 eventos cada 10 segundos por (empleado_id, tipo)
-asistencia_limiter = RateLimiter(max_events=4, window_seconds=10.0)
 
+# Para /asistencia: ráfaga de 4 eventos, recarga de 4 cada 10 segundos por (empleado_id, tipo)
+asistencia_limiter = make_limiter(max_events=4, window_seconds=10.0, scope="asistencia")
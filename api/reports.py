@@ -0,0 +1,204 @@
+"""Reportes de gestión precalculados (GET /reports/*).
+
+Los gráficos del notebook de análisis (puntualidad, desperdicio, ingresos,
+producción) cargaban tablas completas en pandas. Acá salen de vistas
+materializadas mensuales (ver pg_migrations.sql), así una consulta sobre años
+de datos lee a lo sumo meses × empleados/productos filas.
+
+Las vistas se refrescan cada `REPORTS_REFRESH_S` segundos (0 = nunca; queda el
+refresco manual `POST /reports/refresh`) con `REFRESH MATERIALIZED VIEW
+CONCURRENTLY`, que no bloquea las lecturas. Un advisory lock evita que varios
+workers refresquen a la vez, y un refresco reciente de otro worker se respeta.
+"""
+
+import os
+import time
+import logging
+import threading
+from datetime import date
+from typing import Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .database import engine, _map_api_rol_to_db_name
+
+
+logger = logging.getLogger(__name__)
+
+REPORTS_REFRESH_S = float(os.environ.get("REPORTS_REFRESH_S") or os.environ.get("reports_refresh_s") or 900)
+REPORT_VIEWS = (
+    "mv_puntualidad_mensual",
+    "mv_desperdicio_mensual",
+    "mv_ingresos_mensuales",
+    "mv_produccion_empleado_mensual",
+)
+REFRESH_LOCK_KEY = 7_160_016  # pg_try_advisory_lock: un solo refresco a la vez en todo el cluster
+
+# Filtro de rango común: meses que se solapan con [desde, hasta]
+_RANGO = (
+    "(CAST(:desde AS date) IS NULL OR m.mes >= date_trunc('month', CAST(:desde AS date))) "
+    "AND (CAST(:hasta AS date) IS NULL OR m.mes <= CAST(:hasta AS date))"
+)
+
+PUNTUALIDAD_SQL = text(
+    f"""
+    SELECT m.mes, m.id_empleado, e.nombre, e.apellido, r.nombre AS rol,
+           m.entradas, m.tardanzas, m.retraso_total_min / m.entradas AS retraso_prom_min
+    FROM mv_puntualidad_mensual m
+    JOIN empleado e ON e.id_empleado = m.id_empleado
+    LEFT JOIN rol r ON r.id_rol = e.id_rol
+    WHERE {_RANGO}
+      AND (CAST(:id AS integer) IS NULL OR m.id_empleado = :id)
+      AND (CAST(:rol AS text) IS NULL OR LOWER(r.nombre) = LOWER(:rol))
+    ORDER BY m.mes, m.id_empleado
+    """
+)
+DESPERDICIO_SQL = text(
+    f"""
+    SELECT m.mes, m.id_producto, p.nombre AS producto, m.lotes, m.unidades, m.valor
+    FROM mv_desperdicio_mensual m
+    JOIN producto p ON p.id_producto = m.id_producto
+    WHERE {_RANGO}
+    ORDER BY m.mes, m.id_producto
+    """
+)
+INGRESOS_SQL = text(
+    f"""
+    SELECT m.mes, SUM(m.ventas) AS ventas, SUM(m.unidades) AS unidades, SUM(m.ingresos) AS ingresos
+    FROM mv_ingresos_mensuales m
+    WHERE {_RANGO}
+    GROUP BY m.mes
+    ORDER BY m.mes
+    """
+)
+INGRESOS_POR_PRODUCTO_SQL = text(
+    f"""
+    SELECT m.mes, m.id_producto, p.nombre AS producto, m.ventas, m.unidades, m.ingresos
+    FROM mv_ingresos_mensuales m
+    JOIN producto p ON p.id_producto = m.id_producto
+    WHERE {_RANGO}
+    ORDER BY m.mes, m.id_producto
+    """
+)
+PRODUCCION_SQL = text(
+    f"""
+    SELECT m.mes, m.id_empleado, e.nombre, e.apellido, r.nombre AS rol,
+           m.producciones, m.unidades, m.horas, m.valor_producido
+    FROM mv_produccion_empleado_mensual m
+    JOIN empleado e ON e.id_empleado = m.id_empleado
+    LEFT JOIN rol r ON r.id_rol = e.id_rol
+    WHERE {_RANGO}
+      AND (CAST(:id AS integer) IS NULL OR m.id_empleado = :id)
+      AND (CAST(:rol AS text) IS NULL OR LOWER(r.nombre) = LOWER(:rol))
+    ORDER BY m.mes, m.id_empleado
+    """
+)
+ACTUALIZADO_SQL = text("SELECT actualizado FROM reporte_refresco WHERE vista = :v")
+
+
+def _rows(db: Session, sql, params: dict) -> list[dict]:
+    return [dict(r) for r in db.execute(sql, params).mappings().all()]
+
+
+def _actualizado(db: Session, vista: str):
+    return db.execute(ACTUALIZADO_SQL, {"v": vista}).scalar()
+
+
+def _rol_param(rol: Optional[str]) -> Optional[str]:
+    return _map_api_rol_to_db_name(rol) if rol else None
+
+
+def get_puntualidad(db: Session, desde: Optional[date], hasta: Optional[date], id_empleado: Optional[int] = None, rol: Optional[str] = None) -> dict:
+    """Entradas, tardanzas (después de las 08:00) y retraso promedio por empleado y mes."""
+    params = {"desde": desde, "hasta": hasta, "id": id_empleado, "rol": _rol_param(rol)}
+    return {"actualizado": _actualizado(db, "mv_puntualidad_mensual"), "rows": _rows(db, PUNTUALIDAD_SQL, params)}
+
+
+def get_desperdicio(db: Session, desde: Optional[date], hasta: Optional[date]) -> dict:
+    """Lotes vencidos con stock y su valor, por producto y mes de vencimiento."""
+    return {"actualizado": _actualizado(db, "mv_desperdicio_mensual"), "rows": _rows(db, DESPERDICIO_SQL, {"desde": desde, "hasta": hasta})}
+
+
+def get_ingresos(db: Session, desde: Optional[date], hasta: Optional[date], por_producto: bool = False) -> dict:
+    """Ingresos por ventas por mes (o por mes y producto)."""
+    sql = INGRESOS_POR_PRODUCTO_SQL if por_producto else INGRESOS_SQL
+    return {"actualizado": _actualizado(db, "mv_ingresos_mensuales"), "rows": _rows(db, sql, {"desde": desde, "hasta": hasta})}
+
+
+def get_produccion(db: Session, desde: Optional[date], hasta: Optional[date], id_empleado: Optional[int] = None, rol: Optional[str] = None) -> dict:
+    """Unidades, horas y valor producido por empleado y mes."""
+    params = {"desde": desde, "hasta": hasta, "id": id_empleado, "rol": _rol_param(rol)}
+    return {"actualizado": _actualizado(db, "mv_produccion_empleado_mensual"), "rows": _rows(db, PRODUCCION_SQL, params)}
+
+
+REFRESH_RECENT_SQL = text(
+    "SELECT COUNT(*) FROM reporte_refresco "
+    "WHERE vista = ANY(:vistas) AND actualizado > now() - make_interval(secs => :s)"
+)
+REFRESH_MARK_SQL = text(
+    """
+    INSERT INTO reporte_refresco (vista, actualizado, duracion_ms) VALUES (:v, now(), :ms)
+    ON CONFLICT (vista) DO UPDATE SET actualizado = EXCLUDED.actualizado, duracion_ms = EXCLUDED.duracion_ms
+    """
+)
+
+
+def refresh_reports(min_age_s: float = 0.0) -> Optional[Dict[str, float]]:
+    """Refresca todas las vistas; retorna ms por vista, o None si otro proceso está refrescando.
+
+    Con `min_age_s` > 0 no hace nada (retorna {}) si todas se refrescaron hace menos de eso.
+    """
+    with engine.connect() as conn:
+        if not conn.execute(text("SELECT pg_try_advisory_lock(:k)"), {"k": REFRESH_LOCK_KEY}).scalar():
+            conn.rollback()
+            return None
+        try:
+            if min_age_s > 0:
+                recent = conn.execute(REFRESH_RECENT_SQL, {"vistas": list(REPORT_VIEWS), "s": min_age_s}).scalar()
+                if recent == len(REPORT_VIEWS):
+                    conn.commit()
+                    return {}
+            out: Dict[str, float] = {}
+            for vista in REPORT_VIEWS:  # una transacción por vista: no retiene locks de las demás
+                t0 = time.perf_counter()
+                conn.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {vista}"))
+                out[vista] = (time.perf_counter() - t0) * 1000.0
+                conn.execute(REFRESH_MARK_SQL, {"v": vista, "ms": out[vista]})
+                conn.commit()
+            return out
+        finally:
+            conn.rollback()
+            conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": REFRESH_LOCK_KEY})
+            conn.commit()
+
+
+_stop = threading.Event()
+_refresher: Optional[threading.Thread] = None
+
+
+def _refresh_loop(interval: float):
+    while not _stop.is_set():
+        try:
+            # Si otro worker refrescó hace poco, se saltea este ciclo
+            done = refresh_reports(min_age_s=interval / 2)
+            if done:
+                logger.info("Reportes refrescados: %s", ", ".join(f"{v}={ms:.0f}ms" for v, ms in done.items()))
+        except Exception:
+            logger.warning("No se pudieron refrescar los reportes", exc_info=True)
+        _stop.wait(interval)
+
+
+def start_reports_refresher():
+    """Refresco periódico de las vistas de reportes (si REPORTS_REFRESH_S > 0)."""
+    global _refresher
+    if REPORTS_REFRESH_S > 0 and _refresher is None:
+        _stop.clear()
+        _refresher = threading.Thread(target=_refresh_loop, args=(REPORTS_REFRESH_S,), name="reports-refresher", daemon=True)
+        _refresher.start()
+
+
+def stop_reports_refresher():
+    global _refresher
+    _stop.set()
+    _refresher = None
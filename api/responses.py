@@ -0,0 +1,141 @@
+"""Serialización y compresión de respuestas HTTP.
+
+- `dumps`: JSON a bytes con orjson si está instalado (serializa arrays numpy
+  sin pasar por listas de Python); si no, `json` de la stdlib. Lo usan los
+  caminos calientes que arman el cuerpo a mano (galería, /match) en lugar de
+  crear un modelo Pydantic por elemento.
+- `negotiate_encoding` / `encode_body`: br (si está `brotli`) o gzip según
+  `Accept-Encoding`.
+- `CompressionMiddleware`: comprime respuestas grandes de un solo bloque
+  (JSON/texto de más de `COMPRESS_MIN_BYTES`). No toca las que ya traen
+  `Content-Encoding` (la galería llega comprimida y cacheada) ni las de
+  streaming (exportaciones).
+"""
+
+import os
+import gzip
+import json
+from typing import Optional
+
+from fastapi import Response
+from fastapi.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES") or os.environ.get("compress_min_bytes") or 1024)
+GZIP_LEVEL = int(os.environ.get("GZIP_LEVEL") or os.environ.get("gzip_level") or 6)
+BROTLI_QUALITY = int(os.environ.get("BROTLI_QUALITY") or os.environ.get("brotli_quality") or 5)
+# Por encima de esto la compresión sale del event loop
+COMPRESS_THREAD_BYTES = 64 * 1024
+JSON_MEDIA_TYPE = "application/json"
+
+
+def _default(obj):
+    if hasattr(obj, "tolist"):  # numpy
+        return obj.tolist()
+    raise TypeError(f"No serializable: {type(obj).__name__}")
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def json_response(obj, status_code: int = 200, headers: Optional[dict] = None) -> Response:
+    """Respuesta JSON ya serializada (sin validar contra el response_model)."""
+    return Response(content=dumps(obj), status_code=status_code, media_type=JSON_MEDIA_TYPE, headers=headers)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """'br', 'gzip' o None según `Accept-Encoding` (respeta q=0)."""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip()] = q
+    wildcard = accepted.get("*", 0.0)
+    if brotli is not None and accepted.get("br", wildcard) > 0:
+        return "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+
+def encode_body(body: bytes, encoding: Optional[str]) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)  # mtime fijo: mismo cuerpo, mismos bytes
+    return body
+
+
+def _compressible(content_type: str) -> bool:
+    ct = content_type.split(";")[0].strip().lower()
+    return ct.startswith("text/") or ct.endswith("json") or ct.endswith("+json") or ct == "application/javascript"
+
+
+class CompressionMiddleware:
+    """Middleware ASGI puro: comprime respuestas de un solo bloque según `Accept-Encoding`."""
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+        start = None
+
+        async def send_wrapper(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message  # se retiene hasta ver el primer bloque del cuerpo
+                return
+            if message["type"] == "http.response.body" and start is not None:
+                pending, start = start, None
+                body = message.get("body", b"")
+                headers = MutableHeaders(raw=list(pending["headers"]))
+                if (
+                    message.get("more_body")
+                    or len(body) < self.minimum_size
+                    or "content-encoding" in headers
+                    or not _compressible(headers.get("content-type", ""))
+                ):
+                    await send(pending)
+                    await send(message)
+                    return
+                if len(body) > COMPRESS_THREAD_BYTES:
+                    body = await run_in_threadpool(encode_body, body, encoding)
+                else:
+                    body = encode_body(body, encoding)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                headers.add_vary_header("Accept-Encoding")
+                await send({**pending, "headers": headers.raw})
+                await send({"type": "http.response.body", "body": body, "more_body": False})
+                return
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
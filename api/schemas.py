@@ -5,9 +5,9 @@ para asegurar contratos claros y validación automática.
 """
 
 from __future__ import annotations
-from typing import List, Optional, Literal
+from typing import Dict, List, Optional, Literal
 from pydantic import BaseModel, Field
-from datetime import date
+from datetime import date, datetime
 
 
 # Auth
@@ -50,12 +50,60 @@ class RegistrarRostroRequest(BaseModel):
     embedding: List[float] = Field(min_items=1)
 
 
+class BulkRowResult(BaseModel):
+    """Resultado de una fila de importación masiva (fila 1 = primer registro)."""
+    row: int
+    dni: Optional[str] = None
+    status: Literal["created", "ok", "duplicate", "not_found", "invalid"]
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class BulkResponse(BaseModel):
+    """Reporte de importación masiva: conteo por estado y resultado por fila."""
+    total: int
+    counts: Dict[str, int]
+    results: List[BulkRowResult]
+
+
 class GalleryItem(BaseModel):
     """Elemento de galería para el tótem (solo id y embedding)."""
     id: int
     embedding: List[float]
 
 
+class GalleryDelta(BaseModel):
+    """Galería incremental: cambios desde la versión que ya tiene el tótem.
+
+    `items` reemplaza todos los embeddings previos de cada id incluido y
+    `deleted` lista ids sin embedding. Si `full` es true, `items` es la galería
+    completa y el cliente debe descartar lo que tenía.
+    """
+    version: int
+    full: bool = False
+    items: List[GalleryItem] = []
+    deleted: List[int] = []
+
+
+# Matching
+class MatchRequest(BaseModel):
+    """Payload para matching en servidor: un embedding o un lote de embeddings."""
+    embedding: Optional[List[float]] = None
+    embeddings: Optional[List[List[float]]] = None
+    k: int = Field(1, ge=1, le=20)
+
+
+class MatchCandidate(BaseModel):
+    """Candidato de la galería con su distancia coseno a la consulta."""
+    id: int
+    distance: float
+
+
+class MatchResponse(BaseModel):
+    """Top-k candidatos por consulta, en el mismo orden que los embeddings enviados."""
+    results: List[List[MatchCandidate]]
+
+
 # Asistencia
 class AsistenciaRequest(BaseModel):
     """Payload para registrar una asistencia del tótem."""
@@ -69,6 +117,101 @@ class AsistenciaResponse(BaseModel):
     """Respuesta exitosa al registrar asistencia."""
     ok: bool = True
     id: int
+    queued: bool = False  # True si quedó en el buffer de escritura (ASISTENCIA_BUFFER=1)
+
+
+ASISTENCIA_BATCH_MAX = 500
+
+
+class AsistenciaEvento(AsistenciaRequest):
+    """Fichada encolada en el tótem: instante del cliente + clave de idempotencia."""
+    fecha: datetime
+    idempotency_key: str = Field(..., min_length=8, max_length=64)
+
+
+class AsistenciaBatchRequest(BaseModel):
+    """Lote de fichadas acumuladas offline por el tótem."""
+    events: List[AsistenciaEvento] = Field(..., min_items=1, max_items=ASISTENCIA_BATCH_MAX)
+
+
+class AsistenciaBatchResult(BaseModel):
+    """Resultado por evento. Todos los estados son finales: el tótem puede descartar el evento.
+
+    - created: registrada.
+    - duplicate: la misma clave ya se había registrado (reintento).
+    - conflict: ya había otra fichada de ese empleado, tipo y día.
+    - unknown_employee: el empleado no existe.
+    - invalid: instante fuera de la ventana aceptada.
+    """
+    idempotency_key: str
+    status: Literal["created", "duplicate", "conflict", "unknown_employee", "invalid"]
+
+
+class AsistenciaBatchResponse(BaseModel):
+    results: List[AsistenciaBatchResult]
+
+
+# Reportes (vistas materializadas mensuales, ver api/reports.py)
+class PuntualidadMensual(BaseModel):
+    mes: date
+    id_empleado: int
+    nombre: Optional[str] = None
+    apellido: Optional[str] = None
+    rol: Optional[str] = None
+    entradas: int
+    tardanzas: int  # entradas después de las 08:00
+    retraso_prom_min: float
+
+
+class DesperdicioMensual(BaseModel):
+    mes: date  # mes de vencimiento
+    id_producto: int
+    producto: str
+    lotes: int
+    unidades: float
+    valor: float
+
+
+class IngresoMensual(BaseModel):
+    mes: date
+    id_producto: Optional[int] = None  # solo con por_producto=true
+    producto: Optional[str] = None
+    ventas: int
+    unidades: float
+    ingresos: float
+
+
+class ProduccionEmpleadoMensual(BaseModel):
+    mes: date
+    id_empleado: int
+    nombre: Optional[str] = None
+    apellido: Optional[str] = None
+    rol: Optional[str] = None
+    producciones: int
+    unidades: float
+    horas: Optional[float] = None
+    valor_producido: float
+
+
+class ReportePuntualidad(BaseModel):
+    """Filas del reporte y último refresco de la vista (None si nunca se refrescó)."""
+    actualizado: Optional[datetime] = None
+    rows: List[PuntualidadMensual]
+
+
+class ReporteDesperdicio(BaseModel):
+    actualizado: Optional[datetime] = None
+    rows: List[DesperdicioMensual]
+
+
+class ReporteIngresos(BaseModel):
+    actualizado: Optional[datetime] = None
+    rows: List[IngresoMensual]
+
+
+class ReporteProduccion(BaseModel):
+    actualizado: Optional[datetime] = None
+    rows: List[ProduccionEmpleadoMensual]
 
 
 class HealthResponse(BaseModel):
@@ -7,17 +7,56 @@ Este módulo centraliza:
 Notas:
 - El secreto JWT se toma de `JWT_SECRET` (o `jwt_secret`) y usa HS256.
 - La API key del tótem se toma de `TOTEM_API_KEY` (o `totem_api_key`).
+- Los tokens ya verificados se cachean (LRU acotado por `JWT_CACHE_SIZE`,
+  default 1024) hasta su `exp`: los paneles que consultan la API seguido no
+  repiten la verificación HS256 en cada request.
 """
 
 import os
 import time
-from typing import Optional
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
 import jwt
 from fastapi import Depends, Header, HTTPException, status, Request
 
 
 JWT_SECRET = os.environ.get("JWT_SECRET") or os.environ.get("jwt_secret") or "dev-secret"
 JWT_ALG = "HS256"
+JWT_CACHE_SIZE = int(os.environ.get("JWT_CACHE_SIZE") or os.environ.get("jwt_cache_size") or 1024)
+
+
+class _TokenCache:
+    """LRU token -> (payload, exp) de tokens verificados; una entrada vencida se descarta al leerla."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._items: "OrderedDict[str, Tuple[dict, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[dict]:
+        with self._lock:
+            item = self._items.get(token)
+            if item is None:
+                return None
+            if item[1] <= time.time():
+                del self._items[token]
+                return None
+            self._items.move_to_end(token)
+            return item[0]
+
+    def put(self, token: str, payload: dict):
+        exp = payload.get("exp")
+        if self.max_size <= 0 or not isinstance(exp, (int, float)):
+            return  # sin exp no se sabe hasta cuándo es válido: no se cachea
+        with self._lock:
+            self._items[token] = (payload, float(exp))
+            self._items.move_to_end(token)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+
+_token_cache = _TokenCache(JWT_CACHE_SIZE)
 
 
 def create_jwt(subject: str, role: str = "admin", ttl_seconds: int = 60 * 60 * 8) -> str:
@@ -39,14 +78,22 @@ def create_jwt(subject: str, role: str = "admin", ttl_seconds: int = 60 * 60 * 8
 
 
 def decode_jwt(token: str) -> dict:
-    """Decodifica y valida un JWT, o lanza 401 si no es válido."""
+    """Decodifica y valida un JWT, o lanza 401 si no es válido.
+
+    Usa la caché de tokens verificados; solo los tokens nuevos pasan por la verificación HS256.
+    """
+    payload = _token_cache.get(token)
+    if payload is not None:
+        return payload
     try:
-        return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALG])
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALG])
     except jwt.PyJWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido")
+    _token_cache.put(token, payload)
+    return payload
 
 
-def get_bearer_token(authorization: Optional[str] = Header(None)) -> str:
+async def get_bearer_token(authorization: Optional[str] = Header(None)) -> str:
     """Extrae el token Bearer del header Authorization.
 
     Formato esperado: "Bearer <token>". Si está ausente o mal formado, retorna 401.
@@ -56,20 +103,26 @@ def get_bearer_token(authorization: Optional[str] = Header(None)) -> str:
     return authorization.split(" ", 1)[1]
 
 
-def require_admin(payload: dict = Depends(lambda token=Depends(get_bearer_token): decode_jwt(token))):
+async def _jwt_payload(token: str = Depends(get_bearer_token)) -> dict:
+    return decode_jwt(token)
+
+
+async def require_admin(payload: dict = Depends(_jwt_payload)):
     """Dependency de FastAPI que exige JWT válido con rol 'admin'.
 
     Devuelve el payload del JWT si es correcto, o 403 si el rol no es válido.
+    Las dependencias de auth son async (CPU breve, sin I/O) para no pasar por el threadpool.
     """
     if payload.get("role") != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Permisos insuficientes")
     return payload
 
 
-def require_api_key(request: Request, x_api_key: Optional[str] = Header(None)):
+async def require_api_key(request: Request, x_api_key: Optional[str] = Header(None)):
     """Dependency de FastAPI que valida el header x-api-key para el tótem.
 
     Permite preflight CORS (OPTIONS) sin exigir API key para evitar 400/401.
+    Es async para no ocupar un hilo del threadpool en cada request del tótem.
     """
     if request.method == "OPTIONS":
         return True
@@ -0,0 +1,111 @@
+"""Benchmark de matching: búsqueda exacta vs índice IVF (api/ann.py).
+
+Genera galerías sintéticas de identidades (un embedding por empleado) y
+consultas ruidosas de empleados conocidos, y mide por tamaño:
+- recall@1 del IVF respecto de la búsqueda exacta (mismo top-1),
+- latencia p50/p99 por consulta (una consulta por llamada, como el tótem),
+- tiempo de construcción del índice.
+
+No requiere DB. Uso:
+  python scripts/bench_ann.py                       # 1k, 10k, 100k con d=128
+  python scripts/bench_ann.py --sizes 1000 10000 --dim 512 --nprobe 4 8 16
+  python scripts/bench_ann.py --json bench_ann.json
+"""
+
+from __future__ import annotations
+
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from api.matching import GalleryMatrix  # noqa: E402
+
+
+def synthetic_gallery(n: int, dim: int, rng: np.random.Generator) -> np.ndarray:
+    """Embeddings normalizados con algo de estructura (mezcla de 64 'tipos' de rostro)."""
+    centers = rng.standard_normal((64, dim)).astype(np.float32)
+    base = centers[rng.integers(0, 64, size=n)] + 0.9 * rng.standard_normal((n, dim)).astype(np.float32)
+    return base / np.linalg.norm(base, axis=1, keepdims=True)
+
+
+def percentile_ms(samples: list[float], p: float) -> float:
+    return float(np.percentile(np.asarray(samples) * 1000.0, p))
+
+
+def time_queries(index: GalleryMatrix, queries: np.ndarray) -> tuple[list[int], list[float]]:
+    top1: list[int] = []
+    lat: list[float] = []
+    for q in queries:
+        t0 = time.perf_counter()
+        res = index.search([q], k=1)
+        lat.append(time.perf_counter() - t0)
+        top1.append(res[0][0][0] if res[0] else -1)
+    return top1, lat
+
+
+def run(sizes: list[int], dim: int, n_queries: int, nprobes: list[int], noise: float, seed: int) -> list[dict]:
+    rng = np.random.default_rng(seed)
+    results: list[dict] = []
+    for n in sizes:
+        gallery = synthetic_gallery(n, dim, rng)
+        rows = list(zip(range(1, n + 1), gallery))
+        picks = rng.integers(0, n, size=n_queries)
+        queries = gallery[picks] + noise * rng.standard_normal((n_queries, dim)).astype(np.float32)
+
+        t0 = time.perf_counter()
+        exact = GalleryMatrix.from_rows(rows, ann=False)
+        build_exact = time.perf_counter() - t0
+        exact_top1, exact_lat = time_queries(exact, queries)
+        results.append({
+            "size": n, "method": "exact", "nprobe": None, "recall_at_1": 1.0,
+            "p50_ms": percentile_ms(exact_lat, 50), "p99_ms": percentile_ms(exact_lat, 99),
+            "build_s": build_exact,
+        })
+        print(f"[{n:>7}] exact        p50={results[-1]['p50_ms']:.3f}ms p99={results[-1]['p99_ms']:.3f}ms build={build_exact:.2f}s", flush=True)
+
+        for nprobe in nprobes:
+            t0 = time.perf_counter()
+            ivf = GalleryMatrix.from_rows(rows, ann=True, nprobe=nprobe)
+            build_ivf = time.perf_counter() - t0
+            ivf_top1, ivf_lat = time_queries(ivf, queries)
+            recall = float(np.mean(np.asarray(ivf_top1) == np.asarray(exact_top1)))
+            results.append({
+                "size": n, "method": "ivf", "nprobe": nprobe, "nlist": ivf.ann.nlist, "recall_at_1": recall,
+                "p50_ms": percentile_ms(ivf_lat, 50), "p99_ms": percentile_ms(ivf_lat, 99),
+                "build_s": build_ivf,
+            })
+            print(
+                f"[{n:>7}] ivf nprobe={nprobe:<3} nlist={ivf.ann.nlist:<4} recall@1={recall:.3f} "
+                f"p50={results[-1]['p50_ms']:.3f}ms p99={results[-1]['p99_ms']:.3f}ms build={build_ivf:.2f}s",
+                flush=True,
+            )
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark exacto vs IVF para matching facial")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="Tamaños de galería")
+    ap.add_argument("--dim", type=int, default=128, help="Dimensión de embedding (default 128)")
+    ap.add_argument("--queries", type=int, default=500, help="Consultas por tamaño (default 500)")
+    ap.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16], help="Valores de nprobe a medir")
+    ap.add_argument("--noise", type=float, default=0.05, help="Ruido de las consultas (default 0.05)")
+    ap.add_argument("--seed", type=int, default=0, help="Semilla (default 0)")
+    ap.add_argument("--json", type=str, default=None, help="Guardar resultados en este archivo JSON")
+    args = ap.parse_args(argv)
+
+    results = run(args.sizes, args.dim, args.queries, args.nprobe, args.noise, args.seed)
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Resultados guardados en {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,363 @@
+"""Benchmark reproducible de la API con tráfico realista (salida JSON).
+
+Reproduce un día típico contra un backend real:
+- Ráfaga de ingresos de la mañana: cada empleado ficha `ingreso` en
+  `POST /asistencia` dentro de una ventana (`--burst-window`), con llegadas
+  concentradas al principio y un porcentaje de dobles toques (deben dar 409).
+- Tótems (`--kiosks`) que piden `/employees/gallery?since=&format=bin` cada
+  `--poll-interval` s con If-None-Match, como `totem/index.html`.
+- Administradores (`--admins`) consultando empleados por DNI y reportes.
+
+Por escenario reporta throughput, latencia p50/p95/p99, tasa de error (códigos
+no esperados o fallas de red) y conteo por código HTTP. El JSON incluye el
+commit, así que los resultados se pueden comparar entre versiones
+(`--compare anterior.json`).
+
+Preparación opcional (DB de desarrollo, p. ej. la de docker-compose.dev.yml):
+- `--init-db`: aplica esquema, migraciones e inserts (scripts/create_db.py).
+- `--seed-profile small|medium|large`: siembra con `seed_synthetic.py
+  --truncate` (semilla `--seed`, hasta ayer) y empleados con embedding.
+- `--spawn`: levanta `uvicorn api.main:app` (`--mode sync|async`, `--workers`).
+
+Antes del tráfico se refrescan las vistas materializadas de /reports (el
+backend levantado no las refresca solo), así los reportes miden los datos
+sembrados y no vistas vacías o viejas.
+
+Requisitos: DATABASE_URL, TOTEM_API_KEY, ADMIN_DNI/ADMIN_PASSWORD (para el
+escenario admin) y `pip install httpx`.
+
+Uso:
+  python scripts/bench_api.py --spawn --init-db --seed-profile small --json bench.json
+  python scripts/bench_api.py --spawn --mode async --workers 2 --compare bench.json
+  python scripts/bench_api.py --base-url http://localhost:8000 --duration 60 --kiosks 50
+
+Atención: `--init-db` y `--seed-profile` reescriben datos, y antes de medir se
+BORRA la asistencia de hoy de los empleados que fichan. Usar solo contra una
+DB de desarrollo.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import subprocess
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+import psycopg
+
+ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = ROOT / "scripts"
+sys.path.insert(0, str(ROOT))
+
+from api.reports import REPORT_VIEWS  # noqa: E402
+
+
+def normalize_dsn(url: str) -> str:
+    return url.replace("postgresql+psycopg://", "postgresql://")
+
+
+def percentile(samples: list[float], p: float) -> float:
+    if not samples:
+        return 0.0
+    s = sorted(samples)
+    return s[min(len(s) - 1, int(round(p / 100.0 * (len(s) - 1))))] * 1000.0
+
+
+class Recorder:
+    """Latencias y códigos de un escenario; `ok` son los códigos esperados."""
+
+    def __init__(self, ok: set[int]):
+        self.ok = ok
+        self.latencies: list[float] = []
+        self.statuses: dict[str, int] = {}
+        self.errors = 0
+        self.first = None
+        self.last = None
+
+    async def call(self, coro):
+        t0 = time.perf_counter()
+        try:
+            res = await coro
+            code = str(res.status_code)
+            failed = res.status_code not in self.ok
+        except httpx.HTTPError as e:
+            res, code, failed = None, type(e).__name__, True
+        t1 = time.perf_counter()
+        self.first = t0 if self.first is None else self.first
+        self.last = t1
+        self.latencies.append(t1 - t0)
+        self.statuses[code] = self.statuses.get(code, 0) + 1
+        self.errors += failed
+        return res
+
+    def summary(self) -> dict:
+        n = len(self.latencies)
+        elapsed = (self.last - self.first) if n else 0.0
+        return {
+            "requests": n,
+            "elapsed_s": round(elapsed, 3),
+            "rps": round(n / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(percentile(self.latencies, 50), 2),
+            "p95_ms": round(percentile(self.latencies, 95), 2),
+            "p99_ms": round(percentile(self.latencies, 99), 2),
+            "max_ms": round(max(self.latencies) * 1000.0, 2) if n else 0.0,
+            "error_rate": round(self.errors / n, 4) if n else 0.0,
+            "status": dict(sorted(self.statuses.items())),
+        }
+
+
+async def checkin_burst(client: httpx.AsyncClient, rec: Recorder, ids: list[int], rng: random.Random, window: float, retry_ratio: float, concurrency: int):
+    """Cada empleado ficha una vez en la ventana (pico al principio); algunos repiten (409)."""
+    sem = asyncio.Semaphore(concurrency)
+    plan = [(rng.triangular(0.0, window, window * 0.2), eid) for eid in ids]
+    plan += [(t + rng.uniform(0.5, 3.0), eid) for t, eid in plan if rng.random() < retry_ratio]
+    plan.sort()
+    t0 = time.perf_counter()
+
+    async def one(at: float, eid: int):
+        await asyncio.sleep(max(0.0, t0 + at - time.perf_counter()))
+        async with sem:
+            await rec.call(client.post("/asistencia", json={"id_empleado": eid, "tipo": "ingreso", "distancia": 0.2, "origen": "bench"}))
+
+    await asyncio.gather(*(one(at, eid) for at, eid in plan))
+
+
+async def kiosk_poll(client: httpx.AsyncClient, rec: Recorder, rng: random.Random, interval: float, stop: float):
+    """Un tótem: galería completa al arrancar y luego deltas/304 cada `interval` s."""
+    version, etag = 0, None
+    await asyncio.sleep(rng.uniform(0.0, interval))
+    while time.perf_counter() < stop:
+        tick = time.perf_counter()
+        headers = {"If-None-Match": etag} if etag else {}
+        res = await rec.call(client.get("/employees/gallery", params={"since": version, "format": "bin"}, headers=headers))
+        if res is not None and res.status_code == 200:
+            version = int(res.headers.get("X-Gallery-Version") or 0)
+            etag = res.headers.get("ETag")
+        await asyncio.sleep(max(0.0, tick + interval - time.perf_counter()))
+
+
+async def admin_loop(client: httpx.AsyncClient, rec: Recorder, docs: list[str], rng: random.Random, think: float, stop: float):
+    """Un administrador: búsqueda por DNI (la mitad de las veces) o un reporte de los últimos meses."""
+    desde = (date.today().replace(day=1) - timedelta(days=90)).isoformat()
+    reports = ["/reports/puntualidad", "/reports/ingresos", "/reports/produccion", "/reports/desperdicio"]
+    while time.perf_counter() < stop:
+        if docs and rng.random() < 0.5:
+            await rec.call(client.get("/employees", params={"dni": rng.choice(docs), "include_embedding": "false"}))
+        else:
+            await rec.call(client.get(rng.choice(reports), params={"desde": desde}))
+        await asyncio.sleep(rng.expovariate(1.0 / think) if think > 0 else 0.0)
+
+
+async def run_traffic(base_url: str, args, ids: list[int], docs: list[str], api_key: str, token: str | None) -> dict:
+    recs = {
+        "checkin_burst": Recorder({200, 409}),
+        "gallery_poll": Recorder({200, 304}),
+    }
+    if token:
+        recs["admin"] = Recorder({200})
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.concurrency + args.kiosks + args.admins, max_keepalive_connections=args.concurrency + args.kiosks + args.admins)
+    async with httpx.AsyncClient(base_url=base_url, headers={"x-api-key": api_key}, limits=limits, timeout=args.timeout) as totem, \
+            httpx.AsyncClient(base_url=base_url, headers={"Authorization": f"Bearer {token}"}, timeout=args.timeout) as admin:
+        stop = time.perf_counter() + args.duration
+        jobs = [kiosk_poll(totem, recs["gallery_poll"], random.Random(rng.random()), args.poll_interval, stop) for _ in range(args.kiosks)]
+        if token:
+            jobs += [admin_loop(admin, recs["admin"], docs, random.Random(rng.random()), args.admin_think, stop) for _ in range(args.admins)]
+
+        async def burst():
+            await asyncio.sleep(args.burst_at)
+            await checkin_burst(totem, recs["checkin_burst"], ids, random.Random(rng.random()), args.burst_window, args.retry_ratio, args.concurrency)
+
+        await asyncio.gather(burst(), *jobs)
+    return {name: rec.summary() for name, rec in recs.items()}
+
+
+def run_script(name: str, *argv: str):
+    subprocess.run([sys.executable, str(SCRIPTS / name), *argv], cwd=str(ROOT), check=True)
+
+
+def fetch_checkin_employees(conn: psycopg.Connection, limit: int | None) -> tuple[list[int], list[str]]:
+    with conn.cursor() as cur:
+        cur.execute("SELECT id_empleado, documento FROM empleado ORDER BY id_empleado" + (" LIMIT %s" if limit else ""), (limit,) if limit else None)
+        rows = cur.fetchall()
+    return [r[0] for r in rows], [str(r[1]) for r in rows if r[1] is not None]
+
+
+def cleanup_today(conn: psycopg.Connection, ids: list[int]) -> None:
+    with conn.cursor() as cur:
+        cur.execute(
+            "DELETE FROM asistencia WHERE id_empleado = ANY(%s) AND fecha >= current_date AND fecha < current_date + 1",
+            (ids,),
+        )
+    conn.commit()
+
+
+def refresh_reports(conn: psycopg.Connection) -> float:
+    """Refresca las vistas de reportes y marca `reporte_refresco`; retorna los ms totales."""
+    # Sin CONCURRENTLY: todavía no hay lectores y el refresco simple es más rápido
+    t0 = time.perf_counter()
+    with conn.cursor() as cur:
+        for vista in REPORT_VIEWS:
+            t = time.perf_counter()
+            cur.execute(f"REFRESH MATERIALIZED VIEW {vista}")
+            cur.execute(
+                "INSERT INTO reporte_refresco (vista, actualizado, duracion_ms) VALUES (%s, now(), %s) "
+                "ON CONFLICT (vista) DO UPDATE SET actualizado = EXCLUDED.actualizado, duracion_ms = EXCLUDED.duracion_ms",
+                (vista, (time.perf_counter() - t) * 1000.0),
+            )
+    conn.commit()
+    return (time.perf_counter() - t0) * 1000.0
+
+
+def wait_ready(base_url: str, timeout: float = 60.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{base_url}/readyz", timeout=2.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.3)
+    raise RuntimeError(f"El backend no quedó listo en {base_url}")
+
+
+def spawn_backend(mode: str, port: int, workers: int) -> subprocess.Popen:
+    # Sin refresco de reportes en segundo plano: no debe competir con lo medido
+    env = dict(os.environ, API_ASYNC="1" if mode == "async" else "0", REPORTS_REFRESH_S="0")
+    cmd = [sys.executable, "-m", "uvicorn", "api.main:app", "--port", str(port), "--workers", str(workers), "--log-level", "warning"]
+    return subprocess.Popen(cmd, cwd=str(ROOT), env=env)
+
+
+def login(base_url: str) -> str | None:
+    dni = os.environ.get("ADMIN_DNI") or os.environ.get("admin_dni")
+    password = os.environ.get("ADMIN_PASSWORD") or os.environ.get("admin_password")
+    if not dni or not password:
+        return None
+    res = httpx.post(f"{base_url}/login", json={"dni": dni, "password": password}, timeout=10.0)
+    return res.json().get("token") if res.status_code == 200 else None
+
+
+def git_commit() -> str | None:
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=str(ROOT), capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=str(ROOT), capture_output=True, text=True).stdout.strip()
+        return sha + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(prev: dict, cur: dict) -> None:
+    """Diferencias de throughput y latencia contra un resultado anterior."""
+    print(f"Comparación contra {prev.get('meta', {}).get('commit')}:")
+    for name, res in cur["scenarios"].items():
+        old = prev.get("scenarios", {}).get(name)
+        if not old:
+            continue
+        def delta(k):
+            return f"{k}={old[k]}→{res[k]} ({(res[k] - old[k]) / old[k] * 100:+.1f}%)" if old[k] else f"{k}={old[k]}→{res[k]}"
+        print(f"  [{name}] " + " ".join(delta(k) for k in ("rps", "p50_ms", "p95_ms", "p99_ms", "error_rate")))
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark de la API con tráfico de tótems y administradores")
+    ap.add_argument("--base-url", default="http://127.0.0.1:8000", help="Backend a medir (sin --spawn)")
+    ap.add_argument("--spawn", action="store_true", help="Levantar uvicorn para la medición")
+    ap.add_argument("--mode", choices=["sync", "async"], default="sync", help="API_ASYNC del backend levantado con --spawn")
+    ap.add_argument("--port", type=int, default=8766, help="Puerto para --spawn (default 8766)")
+    ap.add_argument("--workers", type=int, default=1, help="Workers de uvicorn para --spawn (default 1)")
+    ap.add_argument("--init-db", action="store_true", help="Aplicar esquema, migraciones e inserts antes de sembrar")
+    ap.add_argument("--seed-profile", choices=["small", "medium", "large"], default=None, help="Sembrar con seed_synthetic.py --profile")
+    ap.add_argument("--seed", type=int, default=0, help="Semilla de la siembra y del tráfico (default 0)")
+    ap.add_argument("--duration", type=float, default=40.0, help="Duración del polling y de los admins, en s (default 40)")
+    ap.add_argument("--burst-at", type=float, default=5.0, help="Segundo en que arranca la ráfaga de fichadas (default 5)")
+    ap.add_argument("--burst-window", type=float, default=20.0, help="Ventana de la ráfaga en s (default 20)")
+    ap.add_argument("--retry-ratio", type=float, default=0.1, help="Fracción de empleados que fichan dos veces (default 0.1)")
+    ap.add_argument("--checkin-employees", type=int, default=None, help="Fichan solo los primeros N empleados")
+    ap.add_argument("--concurrency", type=int, default=32, help="Fichadas simultáneas como máximo (default 32)")
+    ap.add_argument("--kiosks", type=int, default=20, help="Tótems sondeando la galería (default 20)")
+    ap.add_argument("--poll-interval", type=float, default=3.0, help="Intervalo de sondeo de la galería en s (default 3)")
+    ap.add_argument("--admins", type=int, default=3, help="Administradores consultando (default 3)")
+    ap.add_argument("--admin-think", type=float, default=1.0, help="Pausa media entre consultas de un admin en s (default 1)")
+    ap.add_argument("--timeout", type=float, default=30.0, help="Timeout por request en s (default 30)")
+    ap.add_argument("--json", type=str, default=None, help="Guardar resultados en este archivo JSON")
+    ap.add_argument("--compare", type=str, default=None, help="JSON de una corrida anterior para comparar")
+    args = ap.parse_args(argv)
+
+    url = os.environ.get("DATABASE_URL") or os.environ.get("database_url")
+    api_key = os.environ.get("TOTEM_API_KEY") or os.environ.get("totem_api_key") or ""
+    if not url:
+        print("Error: definí DATABASE_URL", file=sys.stderr)
+        return 1
+    if args.burst_at + args.burst_window > args.duration:
+        print("Aviso: la ráfaga termina después de --duration; se mide igual hasta que terminen las fichadas.", file=sys.stderr)
+
+    if args.init_db:
+        run_script("create_db.py")
+    if args.seed_profile:
+        end = (date.today() - timedelta(days=1)).isoformat()  # hoy queda libre para la ráfaga
+        run_script("seed_synthetic.py", "--profile", args.seed_profile, "--seed", str(args.seed), "--end", end, "--truncate")
+
+    with psycopg.connect(normalize_dsn(url)) as conn:
+        ids, docs = fetch_checkin_employees(conn, args.checkin_employees)
+        if not ids:
+            print("No hay empleados para fichar.", file=sys.stderr)
+            return 1
+        cleanup_today(conn, ids)
+        print(f"Vistas de reportes refrescadas en {refresh_reports(conn):.0f} ms", file=sys.stderr)
+
+    proc = None
+    base_url = args.base_url
+    if args.spawn:
+        base_url = f"http://127.0.0.1:{args.port}"
+        proc = spawn_backend(args.mode, args.port, args.workers)
+    try:
+        wait_ready(base_url)
+        token = login(base_url)
+        if token is None:
+            print("Sin token de admin (ADMIN_DNI/ADMIN_PASSWORD): se omite el escenario admin.", file=sys.stderr)
+        scenarios = asyncio.run(run_traffic(base_url, args, ids, docs, api_key, token))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=15)
+
+    result = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "backend": {"spawn": args.spawn, "mode": args.mode if args.spawn else None, "workers": args.workers if args.spawn else None},
+            "data": {"profile": args.seed_profile, "seed": args.seed, "employees": len(ids)},
+            "traffic": {
+                k: getattr(args, k)
+                for k in ("duration", "burst_at", "burst_window", "retry_ratio", "concurrency", "kiosks", "poll_interval", "admins", "admin_think")
+            },
+        },
+        "scenarios": scenarios,
+    }
+    for name, res in scenarios.items():
+        print(
+            f"[{name}] {res['requests']} req en {res['elapsed_s']:.1f}s → {res['rps']:.1f} req/s | "
+            f"p50={res['p50_ms']:.1f}ms p95={res['p95_ms']:.1f}ms p99={res['p99_ms']:.1f}ms | "
+            f"errores={res['error_rate'] * 100:.2f}% {res['status']}",
+            flush=True,
+        )
+    if args.compare:
+        compare(json.loads(Path(args.compare).read_text(encoding="utf-8")), result)
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, indent=2), encoding="utf-8")
+        print(f"Resultados guardados en {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
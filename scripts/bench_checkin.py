@@ -0,0 +1,200 @@
+"""Load test del pico de fichadas (POST /asistencia) en modo sync y async.
+
+Simula la ráfaga de las 8:00: todos los empleados fichan 'ingreso' casi a la
+vez desde varios tótems (concurrencia configurable), más reintentos opcionales
+que deben responder 409. Por cada modo reporta requests/s, latencia
+p50/p95/p99 y conteo por código HTTP.
+
+Con `--spawn` levanta el backend (uvicorn) una vez por modo con API_ASYNC=0/1;
+sin `--spawn` mide contra un backend ya levantado en `--base-url`.
+
+Requisitos: DATABASE_URL (para leer/crear empleados y limpiar la fichada del
+día), TOTEM_API_KEY y `pip install httpx`.
+
+Uso:
+  python scripts/bench_checkin.py --spawn --modes sync async --create-employees 500 --cleanup
+  python scripts/bench_checkin.py --base-url http://localhost:8000 --concurrency 64 --json checkin.json
+
+Atención: `--cleanup` BORRA la asistencia de hoy de los empleados usados y
+`--create-employees` inserta empleados de prueba (documento 99xxxxxx). Usar
+solo contra una DB de desarrollo.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import subprocess
+from pathlib import Path
+
+import httpx
+import psycopg
+
+ROOT = Path(__file__).resolve().parents[1]
+BENCH_DOC_PREFIX = "99"
+
+
+def normalize_dsn(url: str) -> str:
+    return url.replace("postgresql+psycopg://", "postgresql://")
+
+
+def ensure_bench_employees(conn: psycopg.Connection, n: int) -> None:
+    """Crea (si faltan) n empleados de prueba con documento 99000000..."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT id_rol FROM rol WHERE LOWER(nombre)='operario'")
+        row = cur.fetchone()
+        id_rol = row[0] if row else None
+        cur.execute(
+            """
+            INSERT INTO empleado (nombre, apellido, documento, id_rol)
+            SELECT 'Bench', 'Empleado ' || g, %s || lpad(g::text, 6, '0'), %s
+            FROM generate_series(0, %s - 1) g
+            WHERE NOT EXISTS (SELECT 1 FROM empleado e WHERE e.documento = %s || lpad(g::text, 6, '0'))
+            """,
+            (BENCH_DOC_PREFIX, id_rol, n, BENCH_DOC_PREFIX),
+        )
+    conn.commit()
+
+
+def fetch_employee_ids(conn: psycopg.Connection, limit: int | None) -> list[int]:
+    with conn.cursor() as cur:
+        cur.execute("SELECT id_empleado FROM empleado ORDER BY id_empleado" + (" LIMIT %s" if limit else ""), (limit,) if limit else None)
+        return [r[0] for r in cur.fetchall()]
+
+
+def cleanup_today(conn: psycopg.Connection, ids: list[int]) -> None:
+    with conn.cursor() as cur:
+        cur.execute(
+            "DELETE FROM asistencia WHERE id_empleado = ANY(%s) AND fecha >= current_date AND fecha < current_date + 1",
+            (ids,),
+        )
+    conn.commit()
+
+
+def percentile(samples: list[float], p: float) -> float:
+    if not samples:
+        return 0.0
+    s = sorted(samples)
+    return s[min(len(s) - 1, int(round(p / 100.0 * (len(s) - 1))))] * 1000.0
+
+
+async def burst(base_url: str, api_key: str, ids: list[int], concurrency: int, repeat: int) -> dict:
+    sem = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    statuses: dict[str, int] = {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, headers={"x-api-key": api_key}, limits=limits, timeout=30.0) as client:
+
+        async def one(eid: int):
+            async with sem:
+                t0 = time.perf_counter()
+                try:
+                    res = await client.post(
+                        "/asistencia",
+                        json={"id_empleado": eid, "tipo": "ingreso", "distancia": 0.2, "origen": "bench"},
+                    )
+                    code = str(res.status_code)
+                except httpx.HTTPError as e:
+                    code = type(e).__name__
+                latencies.append(time.perf_counter() - t0)
+                statuses[code] = statuses.get(code, 0) + 1
+
+        jobs = [eid for _ in range(repeat) for eid in ids]
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(eid) for eid in jobs))
+        elapsed = time.perf_counter() - t0
+    return {
+        "requests": len(jobs),
+        "elapsed_s": elapsed,
+        "rps": len(jobs) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "status": statuses,
+    }
+
+
+def wait_ready(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{base_url}/healthz", timeout=2.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.3)
+    raise RuntimeError(f"El backend no respondió en {base_url}")
+
+
+def spawn_backend(mode: str, port: int, workers: int) -> subprocess.Popen:
+    env = dict(os.environ, API_ASYNC="1" if mode == "async" else "0")
+    cmd = [sys.executable, "-m", "uvicorn", "api.main:app", "--port", str(port), "--workers", str(workers), "--log-level", "warning"]
+    return subprocess.Popen(cmd, cwd=str(ROOT), env=env)
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Load test de la ráfaga de fichadas (/asistencia)")
+    ap.add_argument("--base-url", default="http://127.0.0.1:8000", help="Backend a medir (sin --spawn)")
+    ap.add_argument("--spawn", action="store_true", help="Levantar uvicorn por cada modo")
+    ap.add_argument("--modes", nargs="+", default=["sync", "async"], choices=["sync", "async"], help="Modos a medir con --spawn")
+    ap.add_argument("--port", type=int, default=8765, help="Puerto para --spawn (default 8765)")
+    ap.add_argument("--workers", type=int, default=1, help="Workers de uvicorn para --spawn (default 1)")
+    ap.add_argument("--employees", type=int, default=None, help="Usar solo los primeros N empleados")
+    ap.add_argument("--create-employees", type=int, default=0, help="Crear N empleados de prueba si faltan")
+    ap.add_argument("--concurrency", type=int, default=32, help="Requests simultáneos (default 32)")
+    ap.add_argument("--repeat", type=int, default=1, help="Fichadas por empleado (>1 agrega reintentos 409)")
+    ap.add_argument("--cleanup", action="store_true", help="Borrar la asistencia de hoy de esos empleados antes de cada modo")
+    ap.add_argument("--json", type=str, default=None, help="Guardar resultados en este archivo JSON")
+    args = ap.parse_args(argv)
+
+    url = os.environ.get("DATABASE_URL") or os.environ.get("database_url")
+    api_key = os.environ.get("TOTEM_API_KEY") or os.environ.get("totem_api_key") or ""
+    if not url:
+        print("Error: definí DATABASE_URL", file=sys.stderr)
+        return 1
+
+    with psycopg.connect(normalize_dsn(url)) as conn:
+        if args.create_employees:
+            ensure_bench_employees(conn, args.create_employees)
+        ids = fetch_employee_ids(conn, args.employees)
+    if not ids:
+        print("No hay empleados para fichar.", file=sys.stderr)
+        return 1
+
+    modes = args.modes if args.spawn else ["server"]
+    results: dict[str, dict] = {}
+    for mode in modes:
+        if args.cleanup:
+            with psycopg.connect(normalize_dsn(url)) as conn:
+                cleanup_today(conn, ids)
+        proc = None
+        base_url = args.base_url
+        if args.spawn:
+            base_url = f"http://127.0.0.1:{args.port}"
+            proc = spawn_backend(mode, args.port, args.workers)
+        try:
+            wait_ready(base_url)
+            res = asyncio.run(burst(base_url, api_key, ids, args.concurrency, args.repeat))
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.wait(timeout=15)
+        results[mode] = res
+        print(
+            f"[{mode}] {res['requests']} req en {res['elapsed_s']:.2f}s → {res['rps']:.1f} req/s | "
+            f"p50={res['p50_ms']:.1f}ms p95={res['p95_ms']:.1f}ms p99={res['p99_ms']:.1f}ms | {res['status']}",
+            flush=True,
+        )
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Resultados guardados en {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
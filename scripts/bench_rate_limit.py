@@ -0,0 +1,170 @@
+"""Microbenchmark de los rate limiters (api/rate_limit.py).
+
+Mide el costo de `check()` y la memoria retenida con muchas claves distintas
+(por defecto 1.000.000), comparando:
+- legacy: el limiter anterior (deque por clave, sin desalojo), reproducido acá,
+- bucket: token bucket en memoria con LRU acotado (RATE_LIMIT_MAX_KEYS); las
+  claves llegan repartidas en 10 ventanas (reloj simulado), así las viejas
+  quedan inactivas y se pueden descartar,
+- bucket-unbounded: el mismo sin tope, para ver el costo por clave,
+- bucket-burst: todas las claves dentro de una misma ventana (más que el tope).
+  No se descarta ninguna activa: el mapa crece temporalmente y una clave que
+  agotó sus tokens antes de la avalancha sigue rechazada después.
+Con `--postgres N` mide además N chequeos contra la tabla compartida
+(requiere DATABASE_URL y las migraciones aplicadas).
+
+Uso:
+  python scripts/bench_rate_limit.py
+  python scripts/bench_rate_limit.py --keys 200000 --max-keys 50000 --postgres 2000 --json rl.json
+"""
+
+from __future__ import annotations
+
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+from collections import defaultdict, deque
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from api.rate_limit import TokenBucketLimiter  # noqa: E402
+
+
+class LegacyDequeLimiter:
+    """Limiter previo: ventana deslizante con un deque por clave, nunca desaloja claves."""
+
+    def __init__(self, max_events: int, window_seconds: float):
+        self.max_events = max_events
+        self.window = window_seconds
+        self.events = defaultdict(lambda: deque())
+
+    def allow(self, key) -> bool:
+        now = time.time()
+        q = self.events[key]
+        while q and now - q[0] > self.window:
+            q.popleft()
+        if len(q) >= self.max_events:
+            return False
+        q.append(now)
+        return True
+
+
+class SimulatedClock:
+    """Reloj para `TokenBucketLimiter.clock` que avanza `tick` segundos por lectura."""
+
+    def __init__(self, tick: float):
+        self.now = 0.0
+        self.tick = tick
+
+    def __call__(self) -> float:
+        self.now += self.tick
+        return self.now
+
+
+def measure(name: str, limiter, n_keys: int, hot_checks: int) -> dict:
+    keys = [(str(i), "ingreso") for i in range(n_keys)]
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    for k in keys:
+        limiter.allow(k)
+    distinct_s = time.perf_counter() - t0
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Caso típico: pocas claves calientes repetidas (empleados fichando)
+    hot = keys[:1000]
+    t0 = time.perf_counter()
+    for i in range(hot_checks):
+        limiter.allow(hot[i % len(hot)])
+    hot_s = time.perf_counter() - t0
+    res = {
+        "limiter": name,
+        "keys": n_keys,
+        "ns_per_check_distinct": distinct_s / n_keys * 1e9,
+        "ns_per_check_hot": hot_s / hot_checks * 1e9,
+        "retained_mb": current / 2**20,
+        "peak_mb": peak / 2**20,
+    }
+    print(
+        f"{name:<17} distinct={res['ns_per_check_distinct']:.0f} ns/check hot={res['ns_per_check_hot']:.0f} ns/check "
+        f"mem={res['retained_mb']:.1f} MB (pico {res['peak_mb']:.1f} MB)",
+        flush=True,
+    )
+    return res
+
+
+def measure_burst(n_keys: int, max_keys: int) -> dict:
+    limiter = TokenBucketLimiter(4, 10.0, max_keys=max_keys)
+    drained = ("drained", "ingreso")
+    while limiter.allow(drained):
+        pass
+    t0 = time.perf_counter()
+    for i in range(n_keys):
+        limiter.allow((str(i), "ingreso"))
+    elapsed = time.perf_counter() - t0
+    res = {
+        "limiter": "bucket-burst",
+        "keys": n_keys,
+        "max_keys": max_keys,
+        "ns_per_check_distinct": elapsed / n_keys * 1e9,
+        "retained_keys": len(limiter.buckets),
+        "drained_still_limited": not limiter.allow(drained),
+    }
+    print(
+        f"{'bucket-burst':<17} distinct={res['ns_per_check_distinct']:.0f} ns/check claves retenidas={res['retained_keys']} "
+        f"(tope {max_keys}) clave agotada sigue limitada={res['drained_still_limited']}",
+        flush=True,
+    )
+    return res
+
+
+def measure_postgres(n: int) -> dict:
+    from api.rate_limit import PostgresRateLimiter
+
+    limiter = PostgresRateLimiter(4, 10.0, scope="bench")
+    lat = []
+    for i in range(n):
+        t0 = time.perf_counter()
+        limiter.allow((str(i % 500), "ingreso"))
+        lat.append(time.perf_counter() - t0)
+    lat.sort()
+    res = {
+        "limiter": "postgres",
+        "checks": n,
+        "p50_ms": lat[len(lat) // 2] * 1000.0,
+        "p99_ms": lat[min(len(lat) - 1, int(len(lat) * 0.99))] * 1000.0,
+    }
+    print(f"{'postgres':<17} p50={res['p50_ms']:.2f} ms p99={res['p99_ms']:.2f} ms ({n} chequeos)", flush=True)
+    return res
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Microbenchmark de rate limiters")
+    ap.add_argument("--keys", type=int, default=1_000_000, help="Claves distintas (default 1.000.000)")
+    ap.add_argument("--max-keys", type=int, default=100_000, help="Tope LRU del token bucket (default 100.000)")
+    ap.add_argument("--hot-checks", type=int, default=200_000, help="Chequeos sobre claves calientes (default 200.000)")
+    ap.add_argument("--postgres", type=int, default=0, help="Chequeos contra el backend Postgres (default 0: omitir)")
+    ap.add_argument("--json", type=str, default=None, help="Guardar resultados en este archivo JSON")
+    args = ap.parse_args(argv)
+
+    bucket = TokenBucketLimiter(4, 10.0, max_keys=args.max_keys)
+    bucket.clock = SimulatedClock(10 * bucket.window / args.keys)
+    results = [
+        measure("legacy", LegacyDequeLimiter(4, 10.0), args.keys, args.hot_checks),
+        measure("bucket", bucket, args.keys, args.hot_checks),
+        measure("bucket-unbounded", TokenBucketLimiter(4, 10.0, max_keys=args.keys + 1), args.keys, args.hot_checks),
+        measure_burst(min(args.keys, 2 * args.max_keys), args.max_keys),
+    ]
+    if args.postgres:
+        results.append(measure_postgres(args.postgres))
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Resultados guardados en {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
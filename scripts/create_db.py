@@ -1,6 +1,7 @@
 """Inicialización de la base de datos Postgres (tablas legacy).
 
-Aplica el esquema legacy compatible (scripts/pg_legacy_schema.sql) y los inserts
+Aplica el esquema legacy compatible (scripts/pg_legacy_schema.sql), las
+migraciones incrementales (scripts/pg_migrations.sql) y los inserts
 estáticos (scripts/inserts.sql) manteniendo la lógica y estructura original de
 las tablas: rol, empleado, cliente, producto, lote, produccion, venta,
 asistencia, embedding.
@@ -22,6 +23,7 @@ import psycopg
 ROOT = Path(__file__).resolve().parents[1]
 SCRIPTS = ROOT / "scripts"
 SCHEMA_SQL = SCRIPTS / "pg_legacy_schema.sql"
+MIGRATIONS_SQL = SCRIPTS / "pg_migrations.sql"
 INSERTS_SQL = SCRIPTS / "inserts.sql"
 
 
@@ -60,6 +62,9 @@ def main():
             print(f"Aplicando esquema: {SCHEMA_SQL}")
             apply_sql(conn, read_sql(SCHEMA_SQL))
 
+            print(f"Aplicando migraciones: {MIGRATIONS_SQL}")
+            apply_sql(conn, read_sql(MIGRATIONS_SQL))
+
             if INSERTS_SQL.exists():
                 print(f"Aplicando inserts estáticos: {INSERTS_SQL}")
                 apply_sql(conn, read_sql(INSERTS_SQL))
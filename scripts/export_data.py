@@ -0,0 +1,79 @@
+"""Exporta asistencia, producción o ventas a CSV/Parquet sin cargar la tabla en memoria.
+
+Misma lógica que `GET /export/{dataset}` (api/export.py): cursor del lado del
+servidor y escritura por bloques. Requiere DATABASE_URL; Parquet requiere
+`pip install pyarrow`.
+
+Uso:
+  python scripts/export_data.py asistencia --desde 2025-01-01 --hasta 2025-12-31 -o asistencia_2025.csv
+  python scripts/export_data.py produccion --format parquet --empleado 12 -o produccion_12.parquet
+  python scripts/export_data.py venta > ventas.csv
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+import argparse
+from datetime import date
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.pool import NullPool  # noqa: E402
+
+from api.export import EXPORT_CHUNK_ROWS, EXPORT_DATASETS, EXPORT_FORMATS, build_export_query, parquet_available, stream_export  # noqa: E402
+
+
+def normalize_dsn(url: str) -> str:
+    """URL de SQLAlchemy con el driver psycopg 3 (acepta también postgresql:// a secas)."""
+    return url.replace("postgresql://", "postgresql+psycopg://", 1) if url.startswith("postgresql://") else url
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Exportación en streaming de asistencia, producción y ventas")
+    ap.add_argument("dataset", choices=sorted(EXPORT_DATASETS))
+    ap.add_argument("--format", choices=EXPORT_FORMATS, default=None, help="csv o parquet (default: según la extensión de -o, si no csv)")
+    ap.add_argument("--desde", type=date.fromisoformat, default=None, help="Fecha inicial (YYYY-MM-DD)")
+    ap.add_argument("--hasta", type=date.fromisoformat, default=None, help="Fecha final inclusive (YYYY-MM-DD)")
+    ap.add_argument("--empleado", type=int, default=None, help="Solo este id_empleado (asistencia, produccion)")
+    ap.add_argument("--chunk-rows", type=int, default=EXPORT_CHUNK_ROWS, help=f"Filas por bloque (default {EXPORT_CHUNK_ROWS})")
+    ap.add_argument("-o", "--output", type=str, default=None, help="Archivo de salida (default: stdout)")
+    args = ap.parse_args(argv)
+
+    url = os.environ.get("DATABASE_URL") or os.environ.get("database_url")
+    if not url:
+        print("Error: definí DATABASE_URL", file=sys.stderr)
+        return 1
+    fmt = args.format or ("parquet" if args.output and args.output.endswith(".parquet") else "csv")
+    if fmt == "parquet" and not parquet_available():
+        print("Error: Parquet requiere pyarrow (pip install pyarrow)", file=sys.stderr)
+        return 1
+    try:
+        stmt, params, columns = build_export_query(args.dataset, args.desde, args.hasta, args.empleado)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    # Una sola conexión, sin pool: no hace falta el engine (ni el resto) de la API
+    engine = create_engine(normalize_dsn(url), poolclass=NullPool)
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    t0 = time.perf_counter()
+    written = 0
+    try:
+        for chunk in stream_export(engine, stmt, params, columns, fmt, args.chunk_rows):
+            out.write(chunk)
+            written += len(chunk)
+    finally:
+        if args.output:
+            out.close()
+        engine.dispose()
+    print(f"[{args.dataset}] {written / 2**20:.1f} MB ({fmt}) en {time.perf_counter() - t0:.2f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
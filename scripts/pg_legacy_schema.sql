@@ -11,6 +11,9 @@ DROP TABLE IF EXISTS rol CASCADE;
 DROP TABLE IF EXISTS cliente CASCADE;
 DROP TABLE IF EXISTS producto CASCADE;
 DROP TABLE IF EXISTS embedding CASCADE;
+DROP TABLE IF EXISTS embedding_cambio CASCADE;
+DROP TABLE IF EXISTS rate_limit_bucket CASCADE;
+DROP TABLE IF EXISTS reporte_refresco CASCADE;
 
 CREATE TABLE IF NOT EXISTS producto (
   id_producto SERIAL PRIMARY KEY,
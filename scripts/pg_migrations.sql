@@ -0,0 +1,155 @@
+-- Migraciones incrementales sobre el esquema legacy (idempotentes).
+-- Se aplican después de pg_legacy_schema.sql (create_db.py) o sobre una DB
+-- existente con scripts/migrate_db.py. Cada bloque puede re-ejecutarse.
+
+-- Versionado de la galería: log de cambios de embeddings por empleado.
+-- `version` es monótona y coincide con el orden de commit: el trigger toma un
+-- advisory lock de transacción antes de asignarla, así un cliente que sincronizó
+-- hasta la versión N nunca se pierde un cambio con versión <= N.
+CREATE TABLE IF NOT EXISTS embedding_cambio (
+  version BIGSERIAL PRIMARY KEY,
+  id_empleado INTEGER NOT NULL,
+  fecha TIMESTAMP NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_embedding_cambio_emp ON embedding_cambio(id_empleado);
+
+CREATE OR REPLACE FUNCTION fn_embedding_cambio() RETURNS trigger AS $$
+BEGIN
+  PERFORM pg_advisory_xact_lock(hashtext('embedding_cambio'));
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    INSERT INTO embedding_cambio (id_empleado) VALUES (OLD.id_empleado);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') AND (TG_OP = 'INSERT' OR NEW.id_empleado <> OLD.id_empleado) THEN
+    INSERT INTO embedding_cambio (id_empleado) VALUES (NEW.id_empleado);
+  END IF;
+  -- Avisa a los workers del backend (LISTEN galeria); se entrega al hacer commit
+  PERFORM pg_notify('galeria', '');
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_embedding_cambio ON embedding;
+CREATE TRIGGER trg_embedding_cambio
+  AFTER INSERT OR UPDATE OR DELETE ON embedding
+  FOR EACH ROW EXECUTE FUNCTION fn_embedding_cambio();
+
+-- Embeddings binarios: float32 little-endian en `embedding_bin` (bytea), ~4-5x
+-- más chico que el JSON y servible tal cual al tótem. `embedding_data` (JSON
+-- texto) queda como formato legacy de lectura; migrate_db.py completa
+-- `embedding_bin` para las filas existentes.
+ALTER TABLE embedding ADD COLUMN IF NOT EXISTS embedding_bin BYTEA;
+ALTER TABLE embedding ALTER COLUMN embedding_data DROP NOT NULL;
+ALTER TABLE embedding DROP CONSTRAINT IF EXISTS chk_embedding_presente;
+ALTER TABLE embedding ADD CONSTRAINT chk_embedding_presente
+  CHECK (embedding_bin IS NOT NULL OR embedding_data IS NOT NULL);
+
+-- Asistencia: una fichada por empleado, tipo y día. El índice único hace
+-- imposible el duplicado aun con varios tótems concurrentes y permite que el
+-- backend registre con un solo `INSERT ... ON CONFLICT DO NOTHING`.
+-- Antes de crearlo se eliminan duplicados existentes (queda la fichada más temprana).
+DELETE FROM asistencia a
+USING asistencia b
+WHERE a.id_empleado = b.id_empleado
+  AND a.tipo = b.tipo
+  AND a.fecha::date = b.fecha::date
+  AND (a.fecha > b.fecha OR (a.fecha = b.fecha AND a.ctid > b.ctid));
+CREATE UNIQUE INDEX IF NOT EXISTS uq_asistencia_emp_tipo_dia ON asistencia (id_empleado, tipo, (fecha::date));
+
+-- Clave de idempotencia de las fichadas que el tótem sube en lote tras un corte
+-- (POST /asistencia/batch): un reintento del mismo evento no se duplica y se
+-- informa como 'duplicate'. Las fichadas en línea no la usan (NULL).
+ALTER TABLE asistencia ADD COLUMN IF NOT EXISTS idempotency_key TEXT;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_asistencia_idempotency ON asistencia (idempotency_key) WHERE idempotency_key IS NOT NULL;
+
+-- Rate limit compartido entre workers (RATE_LIMIT_BACKEND=postgres): un token
+-- bucket por clave. UNLOGGED: no genera WAL y se vacía tras un crash, lo cual
+-- está bien para estado efímero.
+CREATE UNLOGGED TABLE IF NOT EXISTS rate_limit_bucket (
+  clave TEXT PRIMARY KEY,
+  tokens DOUBLE PRECISION NOT NULL,
+  actualizado TIMESTAMPTZ NOT NULL
+);
+
+-- Plantillas por empleado: la última plantilla (GET /employees) y las altas
+-- con desalojo (/registrar_rostro/append) buscan por id_empleado.
+CREATE INDEX IF NOT EXISTS idx_embedding_emp ON embedding (id_empleado, id_embedding);
+
+-- Roles únicos sin distinguir mayúsculas: habilita el upsert de la caché de
+-- roles del backend. Antes se unifican duplicados existentes (los empleados
+-- pasan al id más bajo de cada nombre).
+UPDATE empleado e SET id_rol = d.keep
+FROM (
+  SELECT id_rol, MIN(id_rol) OVER (PARTITION BY LOWER(nombre)) AS keep FROM rol
+) d
+WHERE e.id_rol = d.id_rol AND d.id_rol <> d.keep;
+DELETE FROM rol r USING rol k
+WHERE LOWER(r.nombre) = LOWER(k.nombre) AND r.id_rol > k.id_rol;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_rol_nombre ON rol (LOWER(nombre));
+
+-- Reportes precalculados (GET /reports/*, ver api/reports.py): agregados
+-- mensuales que reemplazan la carga de tablas completas del notebook de
+-- análisis. Se refrescan periódicamente con REFRESH ... CONCURRENTLY, que exige
+-- un índice único sin WHERE en cada vista. `reporte_refresco` guarda cuándo se
+-- refrescó cada una para informarlo en las respuestas.
+CREATE TABLE IF NOT EXISTS reporte_refresco (
+  vista TEXT PRIMARY KEY,
+  actualizado TIMESTAMPTZ NOT NULL,
+  duracion_ms DOUBLE PRECISION NOT NULL
+);
+
+-- Puntualidad: retraso de cada entrada respecto de las 08:00 de ese día
+-- (0 si llegó antes), promediado por empleado y mes.
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_puntualidad_mensual AS
+SELECT date_trunc('month', a.fecha)::date AS mes,
+       a.id_empleado,
+       COUNT(*) AS entradas,
+       COUNT(*) FILTER (WHERE a.fecha > a.fecha::date + time '08:00') AS tardanzas,
+       SUM(GREATEST(0, EXTRACT(EPOCH FROM a.fecha - (a.fecha::date + time '08:00')) / 60))::double precision AS retraso_total_min
+FROM asistencia a
+WHERE a.tipo = 'entrada' AND a.id_empleado IS NOT NULL
+GROUP BY 1, 2;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_puntualidad_mensual ON mv_puntualidad_mensual (mes, id_empleado);
+
+-- Desperdicio: lotes vencidos con stock, valorizados al precio del producto,
+-- por mes de vencimiento. "Vencido" se evalúa en cada refresco.
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_desperdicio_mensual AS
+SELECT date_trunc('month', l.fecha_vto)::date AS mes,
+       l.id_producto,
+       COUNT(*) AS lotes,
+       SUM(l.cantidad) AS unidades,
+       SUM(l.cantidad * p.precio) AS valor
+FROM lote l
+JOIN producto p ON p.id_producto = l.id_producto
+WHERE l.fecha_vto < current_date AND l.cantidad > 0
+GROUP BY 1, 2;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_desperdicio_mensual ON mv_desperdicio_mensual (mes, id_producto);
+
+-- Ingresos: ventas (cantidad * precio) por mes y producto.
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_ingresos_mensuales AS
+SELECT date_trunc('month', v.fecha_venta)::date AS mes,
+       v.id_producto,
+       COUNT(*) AS ventas,
+       SUM(v.cantidad) AS unidades,
+       SUM(v.cantidad * p.precio) AS ingresos
+FROM venta v
+JOIN producto p ON p.id_producto = v.id_producto
+WHERE v.fecha_venta IS NOT NULL
+GROUP BY 1, 2;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_ingresos_mensuales ON mv_ingresos_mensuales (mes, id_producto);
+
+-- Producción: valor producido (cantidad_out * precio del producto del lote)
+-- por empleado y mes.
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_produccion_empleado_mensual AS
+SELECT date_trunc('month', pr.fecha_prod)::date AS mes,
+       pr.id_empleado,
+       COUNT(*) AS producciones,
+       SUM(pr.cantidad_out) AS unidades,
+       SUM(pr.tiempo_horas) AS horas,
+       SUM(pr.cantidad_out * p.precio) AS valor_producido
+FROM produccion pr
+JOIN lote l ON l.id_lote = pr.id_lote
+JOIN producto p ON p.id_producto = l.id_producto
+WHERE pr.fecha_prod IS NOT NULL AND pr.id_empleado IS NOT NULL
+GROUP BY 1, 2;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_produccion_empleado_mensual ON mv_produccion_empleado_mensual (mes, id_empleado);
@@ -19,6 +19,16 @@ Flags útiles:
   --no-ventas          No generar ventas (solo lotes + producción).
   --months N           Meses hacia atrás (default 12).
   --lots-min/-max      Lotes por día hábil (default 10..20).
+  --fast               Modo rápido: genera cada mes vectorizado (numpy), preasigna los
+                       ids de lote desde la secuencia y carga con COPY FROM STDIN.
+  --workers N          Con --fast, reparte los meses entre N procesos.
+  --seed S             Datos reproducibles: misma semilla, mismo --end y misma DB de
+                       partida (p. ej. create_db.py + --truncate) => mismas filas e ids.
+  --end YYYY-MM-DD     Último día sembrado (default hoy).
+  --employees N        Asegura N empleados sintéticos (documento 00000000..) con rol
+                       sorteado y un embedding float32 normalizado (--embedding-dim).
+  --profile P          small | medium | large: meses, lotes/día y empleados predefinidos
+                       (semilla 0 si no se indica otra; medium/large usan --fast).
 """
 
 from __future__ import annotations
@@ -28,10 +38,13 @@ import sys
 import argparse
 import random
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from datetime import date, datetime, time, timedelta
+from time import perf_counter
 from typing import Sequence
 
+import numpy as np
 import psycopg
 
 
@@ -65,7 +78,7 @@ def month_range(start: date, end: date) -> list[date]:
 
 def fetch_ids(conn: psycopg.Connection, table: str, id_col: str) -> list[int]:
     with conn.cursor() as cur:
-        cur.execute(f"SELECT {id_col} FROM {table}")
+        cur.execute(f"SELECT {id_col} FROM {table} ORDER BY {id_col}")
         return [r[0] for r in cur.fetchall()]
 
 
@@ -77,6 +90,7 @@ def fetch_operario_ids(conn: psycopg.Connection) -> list[int]:
             FROM empleado e
             JOIN rol r ON r.id_rol = e.id_rol
             WHERE LOWER(r.nombre) = 'operario'
+            ORDER BY e.id_empleado
             """
         )
         return [r[0] for r in cur.fetchall()]
@@ -203,6 +217,30 @@ def update_lotes_stock(conn: psycopg.Connection, lotes: list[LoteData]):
     print("Stock de lotes actualizado (cantidad=restante).", flush=True)
 
 
+class PendingSet:
+    """Productos con ventas pendientes: sorteo uniforme y baja en O(1) (swap-remove)."""
+
+    def __init__(self, pendientes: dict[int, int]):
+        self.qty = {pid: cant for pid, cant in pendientes.items() if cant > 0}
+        self.items = list(self.qty)
+        self.pos = {pid: i for i, pid in enumerate(self.items)}
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def choice(self) -> int:
+        return self.items[random.randrange(len(self.items))]
+
+    def take(self, pid: int, qty: int) -> None:
+        self.qty[pid] -= qty
+        if self.qty[pid] <= 0:
+            i = self.pos.pop(pid)
+            last = self.items.pop()
+            if last != pid:
+                self.items[i] = last
+                self.pos[last] = i
+
+
 def seed_ventas(
     conn: psycopg.Connection,
     workdays: Sequence[date],
@@ -210,47 +248,86 @@ def seed_ventas(
     commit_every_rows: int = 500,
     verbose: bool = True,
 ):
-    product_ids = list(ventas_pendientes.keys())
+    """30–60 ventas por día hábil de 1–50 unidades hasta agotar lo pendiente por producto.
+
+    Lineal en ventas: el conjunto de pendientes se mantiene incrementalmente y las filas
+    se cargan con COPY en lotes de `commit_every_rows` (un commit por lote).
+    """
     cliente_ids = fetch_ids(conn, "cliente", "id_cliente")
     if not cliente_ids:
         print("No hay clientes; no se generan ventas.", file=sys.stderr, flush=True)
         return
+    pend = PendingSet(ventas_pendientes)
+    batch: list[tuple[int, int, int, date]] = []
     inserted = 0
+    t0 = perf_counter()
     if verbose:
         print("[ventas] Inicio", flush=True)
-    with conn.cursor() as cur:
-        for day_idx, d in enumerate(workdays, start=1):
-            pend = [pid for pid, cant in ventas_pendientes.items() if cant > 0]
+
+    def flush():
+        nonlocal inserted
+        with conn.cursor() as cur:
+            with cur.copy("COPY venta (id_cliente, id_producto, cantidad, fecha_venta) FROM STDIN") as cp:
+                for row in batch:
+                    cp.write_row(row)
+        conn.commit()
+        inserted += len(batch)
+        batch.clear()
+        if verbose:
+            print(f"[ventas] Insertadas: {inserted} ({inserted / (perf_counter() - t0):.0f} filas/s)", flush=True)
+
+    for d in workdays:
+        if not pend:
+            break
+        for _ in range(random.randint(30, 60)):
             if not pend:
                 break
-            # Inserciones de ventas simuladas por día
-            for _ in range(random.randint(30, 60)):
-                pend = [pid for pid, cant in ventas_pendientes.items() if cant > 0]
-                if not pend:
-                    break
-                pid = random.choice(pend)
-                max_qty = min(50, ventas_pendientes[pid])
-                if max_qty <= 0:
-                    continue
-                qty = random.randint(1, max_qty)
-                cid = random.choice(cliente_ids)
-                cur.execute(
-                    "INSERT INTO venta (id_cliente, id_producto, cantidad, fecha_venta) VALUES (%s,%s,%s,%s)",
-                    (cid, pid, qty, d),
-                )
-                ventas_pendientes[pid] -= qty
-                inserted += 1
-                if commit_every_rows and (inserted % commit_every_rows == 0):
-                    conn.commit()
-                    if verbose:
-                        print(f"[ventas] Insertadas: {inserted}", flush=True)
-            # Commit y progreso al final de cada día
-            conn.commit()
-            if verbose:
-                print(f"[ventas] Día {day_idx}/{len(workdays)} — acumuladas: {inserted}", flush=True)
-    conn.commit()
-    if verbose:
-        print(f"Ventas insertadas: {inserted}", flush=True)
+            pid = pend.choice()
+            qty = random.randint(1, min(50, pend.qty[pid]))
+            batch.append((random.choice(cliente_ids), pid, qty, d))
+            pend.take(pid, qty)
+            if len(batch) >= commit_every_rows:
+                flush()
+    if batch:
+        flush()
+    for pid, cant in pend.qty.items():
+        ventas_pendientes[pid] = cant
+    elapsed = perf_counter() - t0
+    print(f"Ventas insertadas: {inserted} en {elapsed:.1f}s ({inserted / elapsed if elapsed else 0:.0f} filas/s)", flush=True)
+
+
+# Perfiles mensuales de puntualidad: (mín, máx) de llegadas tarde por mes
+PERFILES = {
+    "siempre_puntual": (0, 0),
+    "puntual": (0, 1),
+    "ocasional": (1, 2),
+    "recurrente": (2, 4),
+}
+
+
+def asignar_perfiles(emp_ids: Sequence[int], rng) -> dict[int, str]:
+    """Perfil por empleado: los primeros 16 como en el script original; el resto
+    se sortea (con `rng`, un `random.Random` o el módulo) en esas mismas proporciones."""
+    mapa = {
+        0: "siempre_puntual",
+        1: "siempre_puntual",
+        2: "puntual",
+        3: "ocasional",
+        4: "ocasional",
+        5: "recurrente",
+        6: "puntual",
+        7: "recurrente",
+        8: "puntual",
+        9: "recurrente",
+        10: "ocasional",
+        11: "ocasional",
+        12: "siempre_puntual",
+        13: "puntual",
+        14: "puntual",
+        15: "puntual",
+    }
+    base = list(mapa.values())
+    return {eid: mapa[idx] if idx in mapa else rng.choice(base) for idx, eid in enumerate(sorted(emp_ids))}
 
 
 def seed_asistencia(conn: psycopg.Connection, start: date, end: date, verbose: bool = True):
@@ -259,36 +336,8 @@ def seed_asistencia(conn: psycopg.Connection, start: date, end: date, verbose: b
         print("No hay empleados; no se genera asistencia.", file=sys.stderr)
         return
 
-    # Definición de perfiles mensuales
-    perfiles = {
-        "siempre_puntual": (0, 0),
-        "puntual": (0, 1),
-        "ocasional": (1, 2),
-        "recurrente": (2, 4),
-    }
-
-    # Asignación por defecto: primeros 16 como en tu script; resto 'puntual'
-    asignacion: dict[int, str] = {}
-    for idx, eid in enumerate(sorted(emp_ids)):
-        mapa = {
-            0: "siempre_puntual",
-            1: "siempre_puntual",
-            2: "puntual",
-            3: "ocasional",
-            4: "ocasional",
-            5: "recurrente",
-            6: "puntual",
-            7: "recurrente",
-            8: "puntual",
-            9: "recurrente",
-            10: "ocasional",
-            11: "ocasional",
-            12: "siempre_puntual",
-            13: "puntual",
-            14: "puntual",
-            15: "puntual",
-        }
-        asignacion[eid] = mapa.get(idx, "puntual")
+    perfiles = PERFILES
+    asignacion = asignar_perfiles(emp_ids, random)
 
     # Planificación mensual de retrasos por empleado
     retrasos_planificados: set[tuple[date, int]] = set()
@@ -332,11 +381,11 @@ def seed_asistencia(conn: psycopg.Connection, start: date, end: date, verbose: b
                 entrada = datetime.combine(d, time(8, 0)) + timedelta(minutes=entry_var)
                 salida = datetime.combine(d, time(17, 0)) + timedelta(minutes=random.randint(-5, 5))
                 cur.execute(
-                    "INSERT INTO asistencia (id_empleado, fecha, tipo) VALUES (%s,%s,%s)",
+                    "INSERT INTO asistencia (id_empleado, fecha, tipo) VALUES (%s,%s,%s) ON CONFLICT DO NOTHING",
                     (eid, entrada, "entrada"),
                 )
                 cur.execute(
-                    "INSERT INTO asistencia (id_empleado, fecha, tipo) VALUES (%s,%s,%s)",
+                    "INSERT INTO asistencia (id_empleado, fecha, tipo) VALUES (%s,%s,%s) ON CONFLICT DO NOTHING",
                     (eid, salida, "salida"),
                 )
                 total_rows += 2
@@ -347,15 +396,337 @@ def seed_asistencia(conn: psycopg.Connection, start: date, end: date, verbose: b
     print(f"Asistencias insertadas: {total_rows}", flush=True)
 
 
+# ---------------------------------------------------------------------------
+# Empleados sintéticos (--employees N) con roles y embeddings float32
+# ---------------------------------------------------------------------------
+
+SYNTH_DOC_PREFIX = "00"  # documento 00xxxxxx: no choca con DNIs reales
+NOMBRES = ["Ana", "Bruno", "Carla", "Diego", "Elena", "Federico", "Gabriela", "Hernán", "Inés", "Javier",
+           "Laura", "Martín", "Natalia", "Oscar", "Paula", "Ramiro", "Sofía", "Tomás", "Valeria", "Walter"]
+APELLIDOS = ["Acosta", "Benítez", "Castro", "Díaz", "Fernández", "García", "Herrera", "Ibáñez", "Juárez", "López",
+             "Medina", "Núñez", "Ortiz", "Pereyra", "Quiroga", "Romero", "Sosa", "Torres", "Vera", "Zárate"]
+ROLES_SINTETICOS = (("Operario", 0.80), ("Encargado", 0.10), ("Seguridad", 0.07), ("Administrador", 0.03))
+
+
+def np_rng(seed: int | None, stream: int) -> np.random.Generator:
+    """Generador numpy independiente por uso (`stream`); con seed None, entropía del sistema."""
+    return np.random.default_rng(None if seed is None else [stream, seed])
+
+
+def reset_serial(cur: psycopg.Cursor, table: str, id_col: str) -> None:
+    """Deja la secuencia en MAX(id)+1 (ids reproducibles tras borrar filas sintéticas)."""
+    cur.execute(
+        f"SELECT setval(pg_get_serial_sequence(%s, %s), COALESCE(MAX({id_col}), 0) + 1, false) FROM {table}",
+        (table, id_col),
+    )
+
+
+def seed_employees(conn: psycopg.Connection, n: int, dim: int, seed: int | None, replace: bool, verbose: bool = True) -> None:
+    """Asegura n empleados sintéticos (documento 00000000..), sus roles y una plantilla cada uno.
+
+    El empleado i sale siempre igual para la misma seed (se sortean los n completos).
+    Con `replace` (--truncate) se borran antes todos los sintéticos y se reinician las
+    secuencias, así los ids también se repiten entre corridas.
+    """
+    rng = np_rng(seed, 1)
+    nombres = rng.integers(0, len(NOMBRES), n)
+    apellidos = rng.integers(0, len(APELLIDOS), n)
+    roles = rng.choice(len(ROLES_SINTETICOS), n, p=[w for _, w in ROLES_SINTETICOS])
+    emb = rng.standard_normal((n, dim), dtype=np.float32)
+    emb /= np.linalg.norm(emb, axis=1, keepdims=True)
+    docs = [f"{SYNTH_DOC_PREFIX}{i:06d}" for i in range(n)]
+    synth_like = SYNTH_DOC_PREFIX + "%"
+
+    with conn.cursor() as cur:
+        if replace:
+            cur.execute("DELETE FROM embedding WHERE id_empleado IN (SELECT id_empleado FROM empleado WHERE documento LIKE %s)", (synth_like,))
+            cur.execute("DELETE FROM empleado WHERE documento LIKE %s", (synth_like,))
+            reset_serial(cur, "empleado", "id_empleado")
+            reset_serial(cur, "embedding", "id_embedding")
+        for nombre, _ in ROLES_SINTETICOS:
+            cur.execute(
+                "INSERT INTO rol (nombre) SELECT %s WHERE NOT EXISTS (SELECT 1 FROM rol WHERE LOWER(nombre) = LOWER(%s))",
+                (nombre, nombre),
+            )
+        cur.execute("SELECT LOWER(nombre), MIN(id_rol) FROM rol GROUP BY 1")
+        rol_ids = dict(cur.fetchall())
+        cur.execute("SELECT documento FROM empleado WHERE documento LIKE %s", (synth_like,))
+        existentes = {r[0] for r in cur.fetchall()}
+        with cur.copy("COPY empleado (nombre, apellido, documento, id_rol) FROM STDIN") as cp:
+            for i, doc in enumerate(docs):
+                if doc not in existentes:
+                    cp.write_row((NOMBRES[nombres[i]], APELLIDOS[apellidos[i]], doc, rol_ids[ROLES_SINTETICOS[roles[i]][0].lower()]))
+        cur.execute("SELECT documento, id_empleado FROM empleado WHERE documento = ANY(%s)", (docs,))
+        ids = dict(cur.fetchall())
+        emp_ids = [ids[d] for d in docs]
+        cur.execute("DELETE FROM embedding WHERE id_empleado = ANY(%s)", (emp_ids,))
+        with cur.copy("COPY embedding (id_empleado, embedding_bin) FROM STDIN") as cp:
+            for eid, vec in zip(emp_ids, emb.astype("<f4")):
+                cp.write_row((eid, vec.tobytes()))
+    conn.commit()
+    if verbose:
+        print(f"[empleados] {n} sintéticos ({n - len(existentes & set(docs))} nuevos), embeddings d={dim}", flush=True)
+
+
+# ---------------------------------------------------------------------------
+# Modo rápido (--fast): generación vectorizada por mes + COPY FROM STDIN
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class MonthPlan:
+    """Todo lo que necesita un proceso para sembrar un mes sin consultar al resto."""
+    dsn: str
+    label: str
+    days: list[date]
+    lots_per_day: np.ndarray
+    sales_per_day: np.ndarray
+    first_lote_id: int
+    first_produccion_id: int
+    first_venta_id: int
+    rng: np.random.Generator
+    product_ids: list[int]
+    operario_ids: list[int]
+    cliente_ids: list[int]
+    emp_ids: list[int]
+    perfiles: dict[int, str]
+    ventas: bool
+    asistencia: bool
+    direct_asistencia: bool
+
+
+def reserve_ids(conn: psycopg.Connection, table: str, id_col: str, n: int) -> int:
+    """Reserva n ids consecutivos de la secuencia de table.id_col y retorna el primero.
+
+    Supone un único escritor mientras corre el seed (otro nextval concurrente podría caer en el rango).
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT setval(s, nextval(s) + %s - 1) - %s + 1 FROM pg_get_serial_sequence(%s, %s) s",
+            (n, n, table, id_col),
+        )
+        return cur.fetchone()[0]
+
+
+def month_workdays(workdays: Sequence[date]) -> list[list[date]]:
+    out: dict[tuple[int, int], list[date]] = {}
+    for d in workdays:
+        out.setdefault((d.year, d.month), []).append(d)
+    return list(out.values())
+
+
+def _sales_for_month(rng: np.random.Generator, per_day: np.ndarray, pendientes: dict[int, int]) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """(posición, día, producto, cantidad) de las ventas del mes, con la misma forma que `seed_ventas`.
+
+    `per_day` ventas por día hábil (30–60) de 1–50 unidades, de un producto con
+    pendiente; lo que supera el pendiente de cada producto se recorta y las ventas
+    en 0 se descartan (su posición, y por lo tanto su id preasignado, queda libre).
+    """
+    day = np.repeat(np.arange(len(per_day)), per_day)
+    prods = np.array([p for p, v in pendientes.items() if v > 0])
+    if not len(prods):
+        return day[:0], day[:0], day[:0], day[:0]
+    pid = prods[rng.integers(0, len(prods), len(day))]
+    qty = rng.integers(1, 51, len(day))
+    # Pendiente consumido en orden cronológico: acumulado por producto y recorte
+    order = np.lexsort((np.arange(len(day)), pid))
+    q = qty[order]
+    p_sorted = pid[order]
+    cs = np.cumsum(q)
+    starts = np.flatnonzero(np.r_[True, p_sorted[1:] != p_sorted[:-1]])
+    cs -= np.repeat(cs[starts] - q[starts], np.diff(np.r_[starts, len(q)]))
+    cap = np.array([pendientes[int(p)] for p in p_sorted])
+    qty[order] = np.clip(cap - (cs - q), 0, q)
+    keep = np.flatnonzero(qty > 0)
+    return keep, day[keep], pid[keep], qty[keep]
+
+
+def seed_month_fast(plan: MonthPlan) -> dict[str, int]:
+    """Genera y carga con COPY los lotes, producción, ventas y asistencia de un mes."""
+    rng = plan.rng
+    days = np.array(plan.days, dtype="datetime64[D]")
+    counts = {"lote": 0, "produccion": 0, "venta": 0, "asistencia": 0}
+
+    # Lotes y producción: el stock final de cada lote se calcula antes de insertarlo
+    n_lots = int(plan.lots_per_day.sum())
+    ingreso = np.repeat(days, plan.lots_per_day)
+    pid = rng.choice(plan.product_ids, n_lots)
+    vto = ingreso + rng.integers(90, 181, n_lots).astype("timedelta64[D]")
+    cant = rng.integers(500, 2501, n_lots)
+    eid = rng.choice(plan.operario_ids, n_lots)
+    horas = np.round(rng.uniform(4.0, 8.0, n_lots), 2)
+    lote_ids = plan.first_lote_id + np.arange(n_lots)
+    prod_ids = plan.first_produccion_id + np.arange(n_lots)
+
+    # Merma 10–30% por producto; lo vendido se descuenta de sus lotes en orden aleatorio
+    restante = cant.copy()
+    ventas_prod: list[tuple[int, int]] = []
+    for p in np.unique(pid):
+        idx = rng.permutation(np.flatnonzero(pid == p))
+        a = cant[idx]
+        vendido = int(a.sum() * (1 - rng.uniform(0.10, 0.30)))
+        taken = np.clip(vendido - (np.cumsum(a) - a), 0, a)
+        restante[idx] = a - taken
+        ventas_prod.append((int(p), vendido))
+
+    with psycopg.connect(plan.dsn) as conn:
+        with conn.cursor() as cur:
+            with cur.copy("COPY lote (id_lote, id_producto, cantidad, fecha_ingreso, fecha_vto) FROM STDIN") as cp:
+                for row in zip(lote_ids.tolist(), pid.tolist(), restante.tolist(), ingreso.tolist(), vto.tolist()):
+                    cp.write_row(row)
+            with cur.copy("COPY produccion (id_produccion, id_lote, id_empleado, fecha_prod, cantidad_out, tiempo_horas) FROM STDIN") as cp:
+                for row in zip(prod_ids.tolist(), lote_ids.tolist(), eid.tolist(), ingreso.tolist(), cant.tolist(), horas.tolist()):
+                    cp.write_row(row)
+            counts["lote"] = counts["produccion"] = n_lots
+
+            if plan.ventas and plan.cliente_ids and ventas_prod:
+                v_pos, v_day, v_pid, v_qty = _sales_for_month(rng, plan.sales_per_day, dict(ventas_prod))
+                v_cli = rng.choice(plan.cliente_ids, len(v_qty))
+                v_ids = plan.first_venta_id + v_pos
+                with cur.copy("COPY venta (id_venta, id_cliente, id_producto, cantidad, fecha_venta) FROM STDIN") as cp:
+                    for row in zip(v_ids.tolist(), v_cli.tolist(), v_pid.tolist(), v_qty.tolist(), days[v_day].tolist()):
+                        cp.write_row(row)
+                counts["venta"] = len(v_qty)
+
+            if plan.asistencia and plan.emp_ids:
+                emp = np.array(plan.emp_ids)
+                n_d, n_e = len(days), len(emp)
+                late = np.zeros((n_d, n_e), dtype=bool)
+                for j, e in enumerate(plan.emp_ids):
+                    min_r, max_r = PERFILES[plan.perfiles.get(e, "puntual")]
+                    n_r = min(int(rng.integers(min_r, max_r + 1)), n_d)
+                    if n_r:
+                        late[rng.choice(n_d, n_r, replace=False), j] = True
+                presente = rng.random((n_d, n_e)) >= 0.10  # 10% ausencias
+                entry_var = np.where(late, rng.integers(10, 21, (n_d, n_e)), rng.integers(-10, 1, (n_d, n_e)))
+                exit_var = rng.integers(-5, 6, (n_d, n_e))
+                base = days.astype("datetime64[m]")[:, None]
+                entrada = (base + np.timedelta64(8 * 60, "m") + entry_var.astype("timedelta64[m]"))[presente]
+                salida = (base + np.timedelta64(17 * 60, "m") + exit_var.astype("timedelta64[m]"))[presente]
+                ids = np.broadcast_to(emp, (n_d, n_e))[presente].tolist()
+                target = "asistencia"
+                if not plan.direct_asistencia:
+                    # Sin --truncate puede haber fichadas previas: staging + ON CONFLICT DO NOTHING
+                    cur.execute("CREATE TEMP TABLE asistencia_seed (LIKE asistencia INCLUDING DEFAULTS) ON COMMIT DROP")
+                    target = "asistencia_seed"
+                with cur.copy(f"COPY {target} (id_empleado, fecha, tipo) FROM STDIN") as cp:
+                    for i, e_in, s_out in zip(ids, entrada.astype("datetime64[us]").tolist(), salida.astype("datetime64[us]").tolist()):
+                        cp.write_row((i, e_in, "entrada"))
+                        cp.write_row((i, s_out, "salida"))
+                if target != "asistencia":
+                    cur.execute("INSERT INTO asistencia (id_empleado, fecha, tipo) SELECT id_empleado, fecha, tipo FROM asistencia_seed ON CONFLICT DO NOTHING")
+                counts["asistencia"] = 2 * len(ids)
+        conn.commit()
+    return counts
+
+
+def seed_fast(conn: psycopg.Connection, dsn: str, workdays: Sequence[date], args, truncated: bool) -> None:
+    """Siembra mes a mes con COPY; con --workers > 1 reparte los meses entre procesos.
+
+    Diferencias con el modo clásico: la merma y el pendiente de ventas se
+    calculan dentro de cada mes (lo vendido sale de los lotes de ese mes) y el
+    stock final de los lotes se escribe al insertarlos, sin UPDATE posterior.
+    """
+    product_ids = fetch_ids(conn, "producto", "id_producto")
+    if not product_ids:
+        print("No hay productos; abortando.", file=sys.stderr)
+        return
+    operario_ids = fetch_operario_ids(conn) or fetch_ids(conn, "empleado", "id_empleado")
+    cliente_ids = fetch_ids(conn, "cliente", "id_cliente")
+    emp_ids = sorted(fetch_ids(conn, "empleado", "id_empleado"))
+    perfiles = asignar_perfiles(emp_ids, random.Random(args.seed))
+
+    months = month_workdays(workdays)
+    # Un generador por mes derivado de --seed: el resultado no depende de --workers
+    seeds = np.random.SeedSequence(None if args.seed is None else [2, args.seed]).spawn(len(months))
+    rngs = [np.random.default_rng(s) for s in seeds]
+    lots_per_month = [rng.integers(args.lots_min, args.lots_max + 1, len(m)) for rng, m in zip(rngs, months)]
+    sales_per_month = [rng.integers(30, 61, len(m)) for rng, m in zip(rngs, months)]
+    total_lots = int(sum(int(x.sum()) for x in lots_per_month))
+    total_sales = int(sum(int(x.sum()) for x in sales_per_month)) if not args.no_ventas else 0
+    # Ids preasignados por mes: la producción referencia su lote sin RETURNING y los ids
+    # no dependen del orden en que terminan los procesos (las ventas descartadas dejan huecos)
+    next_lote = reserve_ids(conn, "lote", "id_lote", total_lots) if total_lots else 1
+    next_prod = reserve_ids(conn, "produccion", "id_produccion", total_lots) if total_lots else 1
+    next_venta = reserve_ids(conn, "venta", "id_venta", total_sales) if total_sales else 1
+    conn.commit()
+    plans = []
+    for m, lots, sales, rng in zip(months, lots_per_month, sales_per_month, rngs):
+        plans.append(
+            MonthPlan(
+                dsn=dsn, label=m[0].strftime("%Y-%m"), days=m, lots_per_day=lots, sales_per_day=sales,
+                first_lote_id=next_lote, first_produccion_id=next_prod, first_venta_id=next_venta, rng=rng,
+                product_ids=product_ids, operario_ids=operario_ids, cliente_ids=cliente_ids,
+                emp_ids=emp_ids, perfiles=perfiles, ventas=not args.no_ventas, asistencia=not args.no_asistencia,
+                direct_asistencia=truncated,
+            )
+        )
+        next_lote += int(lots.sum())
+        next_prod += int(lots.sum())
+        next_venta += int(sales.sum())
+
+    print(f"[fast] {len(plans)} meses, {total_lots} lotes, {max(1, args.workers)} proceso(s)", flush=True)
+    t0 = perf_counter()
+    totals: dict[str, int] = defaultdict(int)
+
+    def done(plan: MonthPlan, counts: dict[str, int]):
+        for k, v in counts.items():
+            totals[k] += v
+        print(f"[fast] {plan.label}: " + ", ".join(f"{k}={v}" for k, v in counts.items()), flush=True)
+
+    if args.workers > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            for plan, counts in zip(plans, pool.map(seed_month_fast, plans)):
+                done(plan, counts)
+    else:
+        for plan in plans:
+            done(plan, seed_month_fast(plan))
+    elapsed = perf_counter() - t0
+    rows = sum(totals.values())
+    print(
+        f"[fast] {rows} filas en {elapsed:.1f}s ({rows / elapsed if elapsed else 0:.0f} filas/s): "
+        + ", ".join(f"{k}={v}" for k, v in totals.items()),
+        flush=True,
+    )
+
+
+# Tamaños con nombre para benchmarks (los flags explícitos tienen prioridad)
+SIZE_PROFILES = {
+    "small": {"months": 3, "lots_min": 5, "lots_max": 10, "employees": 50, "fast": False},
+    "medium": {"months": 12, "lots_min": 20, "lots_max": 40, "employees": 300, "fast": True},
+    "large": {"months": 36, "lots_min": 100, "lots_max": 200, "employees": 1000, "fast": True},
+}
+DEFAULTS = {"months": 12, "lots_min": 10, "lots_max": 20, "employees": 0, "seed": None}
+
+
+def resolve_args(args: argparse.Namespace) -> argparse.Namespace:
+    """Completa los flags no indicados con el perfil elegido (o los defaults)."""
+    prof = SIZE_PROFILES.get(args.profile or "", {})
+    for k, v in DEFAULTS.items():
+        if getattr(args, k) is None:
+            setattr(args, k, prof.get(k, 0 if args.profile and k == "seed" else v))
+    args.fast = args.fast or prof.get("fast", False)
+    return args
+
+
 def main(argv: list[str] | None = None) -> int:
     ap = argparse.ArgumentParser(description="Seed sintético para esquema legacy (Postgres)")
     ap.add_argument("--truncate", action="store_true", help="TRUNCATE tablas antes de sembrar")
     ap.add_argument("--no-asistencia", action="store_true", help="No generar asistencia")
     ap.add_argument("--no-ventas", action="store_true", help="No generar ventas")
-    ap.add_argument("--months", type=int, default=12, help="Meses hacia atrás (default 12)")
-    ap.add_argument("--lots-min", type=int, default=10, help="Mín. lotes por día hábil (default 10)")
-    ap.add_argument("--lots-max", type=int, default=20, help="Máx. lotes por día hábil (default 20)")
-    args = ap.parse_args(argv)
+    ap.add_argument("--profile", choices=sorted(SIZE_PROFILES), default=None, help="Tamaño con nombre (small|medium|large)")
+    ap.add_argument("--months", type=int, default=None, help="Meses hacia atrás (default 12)")
+    ap.add_argument("--end", type=date.fromisoformat, default=None, help="Último día sembrado, YYYY-MM-DD (default hoy)")
+    ap.add_argument("--lots-min", type=int, default=None, help="Mín. lotes por día hábil (default 10)")
+    ap.add_argument("--lots-max", type=int, default=None, help="Máx. lotes por día hábil (default 20)")
+    ap.add_argument("--employees", type=int, default=None, help="Asegurar N empleados sintéticos con rol y embedding (default 0)")
+    ap.add_argument("--embedding-dim", type=int, default=128, help="Dimensión de los embeddings sintéticos (default 128)")
+    ap.add_argument("--seed", type=int, default=None, help="Semilla: misma semilla y --end => mismos datos (default: al azar; 0 con --profile)")
+    ap.add_argument("--fast", action="store_true", help="Generación vectorizada por mes y carga con COPY")
+    ap.add_argument("--workers", type=int, default=1, help="Con --fast: procesos en paralelo, un mes por tarea (default 1)")
+    args = resolve_args(ap.parse_args(argv))
+    if args.seed is not None:
+        random.seed(args.seed)
 
     url = os.environ.get("DATABASE_URL") or os.environ.get("database_url")
     if not url:
@@ -373,10 +744,18 @@ def main(argv: list[str] | None = None) -> int:
             conn.commit()
             print("Tablas truncadas.")
 
-        end = date.today()
+        if args.employees:
+            seed_employees(conn, args.employees, args.embedding_dim, args.seed, replace=args.truncate)
+
+        end = args.end or date.today()
         start = end - timedelta(days=int(args.months * 30.4))
         workdays = business_days(start, end)
 
+        if args.fast:
+            seed_fast(conn, dsn, workdays, args, truncated=args.truncate)
+            print("Seed sintético finalizado.")
+            return 0
+
         operarios = fetch_operario_ids(conn)
         # Lotes + producción con commits intermedios y progreso
         lotes = seed_lotes_y_produccion(
@@ -0,0 +1,81 @@
+"""Índice IVF (`api/ann.py`) contra la búsqueda exacta de `GalleryMatrix`."""
+
+import numpy as np
+import pytest
+
+from api.matching import GalleryMatrix
+
+
+DIM = 32
+
+
+def synthetic(n: int, rng: np.random.Generator) -> np.ndarray:
+    """Embeddings con estructura (mezcla de 32 'tipos' de rostro), como scripts/bench_ann.py."""
+    centers = rng.standard_normal((32, DIM)).astype(np.float32)
+    return centers[rng.integers(0, 32, size=n)] + 0.9 * rng.standard_normal((n, DIM)).astype(np.float32)
+
+
+def queries_near(gallery: np.ndarray, n: int, rng: np.random.Generator) -> np.ndarray:
+    picks = rng.integers(0, gallery.shape[0], size=n)
+    return gallery[picks] + 0.3 * rng.standard_normal((n, DIM)).astype(np.float32)
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    gallery = synthetic(4000, rng)
+    rows = list(enumerate(gallery))
+    return rows, gallery, queries_near(gallery, 200, rng)
+
+
+def top_ids(index: GalleryMatrix, queries: np.ndarray, k: int = 1):
+    return [[eid for eid, _ in r] for r in index.search(queries, k)]
+
+
+def test_full_probe_equals_exact(data):
+    rows, _, queries = data
+    exact = GalleryMatrix.from_rows(rows, ann=False)
+    ivf = GalleryMatrix.from_rows(rows, ann=True, nprobe=10_000)  # nprobe se acota a nlist
+    assert ivf.ann is not None and ivf.ann.nprobe == ivf.ann.nlist
+    res_exact, res_ivf = exact.search(queries, 5), ivf.search(queries, 5)
+    assert [[e for e, _ in r] for r in res_ivf] == [[e for e, _ in r] for r in res_exact]
+    for re_, ri in zip(res_exact, res_ivf):
+        assert [d for _, d in ri] == pytest.approx([d for _, d in re_], abs=1e-5)
+
+
+def test_recall_at_1(data):
+    rows, _, queries = data
+    exact = top_ids(GalleryMatrix.from_rows(rows, ann=False), queries)
+    ivf = top_ids(GalleryMatrix.from_rows(rows, ann=True, nprobe=8), queries)
+    recall = np.mean([a == b for a, b in zip(exact, ivf)])
+    assert recall >= 0.95
+
+
+def test_incremental_rebuild_reuses_centroids(data):
+    rows, gallery, queries = data
+    first = GalleryMatrix.from_rows(rows, ann=True, nprobe=10_000)
+    moved = {3, 17}
+    rows2 = [(eid, gallery[(eid + 1) % len(gallery)] if eid in moved else emb) for eid, emb in rows]
+    rows2.append((len(rows), gallery[0] * -1.0))
+    second = GalleryMatrix.from_rows(rows2, previous=first, changed=moved, ann=True, nprobe=10_000)
+    assert second.ann.centroids is first.ann.centroids
+    assert top_ids(second, queries, 3) == top_ids(GalleryMatrix.from_rows(rows2, ann=False), queries, 3)
+
+
+def test_templates_return_each_employee_once():
+    rng = np.random.default_rng(1)
+    base = synthetic(300, rng)
+    rows = [(i, e) for i, e in enumerate(base)] + [(i, e + 0.01) for i, e in enumerate(base)]
+    q = base[:5]
+    for ann in (False, True):
+        res = GalleryMatrix.from_rows(rows, ann=ann, nprobe=10_000).search(q, 4)
+        for i, r in enumerate(res):
+            ids = [eid for eid, _ in r]
+            assert ids[0] == i
+            assert len(ids) == len(set(ids)) == 4
+
+
+def test_dimension_mismatch(data):
+    rows, _, _ = data
+    with pytest.raises(ValueError):
+        GalleryMatrix.from_rows(rows, ann=True).search([[0.0] * (DIM + 1)])
@@ -0,0 +1,88 @@
+"""Plan y resultados de `POST /asistencia/batch` (sin DB: el SQL se reemplaza por sus filas)."""
+
+from datetime import datetime, timedelta, timezone
+
+from api.database import (
+    ASISTENCIA_BATCH_MAX_AGE_H,
+    ASISTENCIA_BATCH_MAX_SKEW,
+    _asistencia_batch_plan,
+    _asistencia_batch_results,
+    as_utc,
+)
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def test_plan_maps_tipo_and_keeps_order():
+    t = _now() - timedelta(minutes=1)
+    events = [("k1", 1, "ingreso", t), ("k2", 2, "egreso", t)]
+    params, resolved = _asistencia_batch_plan(events)
+    assert resolved == {}
+    assert params == {"ids": [1, 2], "fechas": [t, t], "tipos": ["entrada", "salida"], "keys": ["k1", "k2"]}
+
+
+def test_plan_rejects_out_of_window():
+    now = _now()
+    events = [
+        ("futuro", 1, "ingreso", now + ASISTENCIA_BATCH_MAX_SKEW + timedelta(minutes=1)),
+        ("viejo", 1, "ingreso", now - timedelta(hours=ASISTENCIA_BATCH_MAX_AGE_H, minutes=1)),
+        ("ok", 1, "ingreso", now + ASISTENCIA_BATCH_MAX_SKEW - timedelta(minutes=1)),
+    ]
+    params, resolved = _asistencia_batch_plan(events)
+    assert resolved == {"futuro": "invalid", "viejo": "invalid"}
+    assert params["keys"] == ["ok"]
+
+
+def test_plan_sends_repeated_key_once():
+    t = _now()
+    events = [("k", 1, "ingreso", t), ("k", 1, "ingreso", t + timedelta(seconds=1)), ("x", 2, "ingreso", t)]
+    params, _ = _asistencia_batch_plan(events)
+    assert params["keys"] == ["k", "x"]
+    assert params["fechas"][0] == t  # gana la primera aparición
+
+
+def test_plan_treats_naive_as_utc():
+    naive = _now().replace(tzinfo=None) - timedelta(minutes=1)
+    params, resolved = _asistencia_batch_plan([("k", 1, "ingreso", naive)])
+    assert resolved == {}
+    assert params["fechas"] == [naive.replace(tzinfo=timezone.utc)]
+    assert as_utc(params["fechas"][0]) is params["fechas"][0]
+
+
+def test_plan_dedupes_large_batch():
+    t = _now()
+    events = [(f"k{i}", i, "ingreso", t) for i in range(20000)] * 2
+    params, _ = _asistencia_batch_plan(events)
+    assert len(params["keys"]) == 20000
+
+
+def test_results_follow_event_order_with_retries_as_duplicate():
+    t = _now()
+    events = [
+        ("a", 1, "ingreso", t),
+        ("b", 2, "ingreso", t),
+        ("a", 1, "ingreso", t),  # reintento dentro del lote
+        ("c", 3, "ingreso", t),
+        ("d", 9, "ingreso", t),
+        ("e", 4, "ingreso", t),
+    ]
+    _, resolved = _asistencia_batch_plan(events)
+    rows = [("a", "created"), ("b", "conflict"), ("c", "duplicate"), ("d", "unknown_employee"), ("e", "created")]
+    assert _asistencia_batch_results(events, resolved, rows) == [
+        ("a", "created"),
+        ("b", "conflict"),
+        ("a", "duplicate"),
+        ("c", "duplicate"),
+        ("d", "unknown_employee"),
+        ("e", "created"),
+    ]
+
+
+def test_results_invalid_stays_invalid_when_repeated():
+    bad = _now() + timedelta(days=1)
+    events = [("z", 1, "ingreso", bad), ("z", 1, "ingreso", bad)]
+    params, resolved = _asistencia_batch_plan(events)
+    assert params["keys"] == []
+    assert _asistencia_batch_results(events, resolved, []) == [("z", "invalid"), ("z", "invalid")]
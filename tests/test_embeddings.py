@@ -0,0 +1,63 @@
+"""Codificación float32 de embeddings y wire format binario de la galería."""
+
+import json
+
+import numpy as np
+
+from api.embeddings import EMBEDDING_DTYPE, GALLERY_FLAG_FULL, decode_embedding, encode_embedding, pack_gallery
+
+
+def unpack_gallery(buf: bytes):
+    """Lectura del wire format como la hace el tótem (typed arrays sobre el buffer)."""
+    count, dim, n_del, flags = np.frombuffer(buf, dtype="<u4", count=4)
+    ids = np.frombuffer(buf, dtype="<i4", count=count, offset=16)
+    deleted = np.frombuffer(buf, dtype="<i4", count=n_del, offset=16 + 4 * count)
+    data = np.frombuffer(buf, dtype="<f4", count=count * dim, offset=16 + 4 * (count + n_del))
+    assert len(buf) == 16 + 4 * (count + n_del) + 4 * count * dim
+    return ids.tolist(), deleted.tolist(), data.reshape(count, dim), bool(flags & GALLERY_FLAG_FULL)
+
+
+def test_encode_decode_roundtrip():
+    values = [0.1, -2.5, 3.0, 1e-7]
+    data = encode_embedding(values)
+    assert len(data) == 4 * len(values)
+    np.testing.assert_array_equal(decode_embedding(data, None), np.asarray(values, dtype=EMBEDDING_DTYPE))
+
+
+def test_decode_prefers_binary_and_reads_legacy_json():
+    legacy = json.dumps([1.0, 2.0])
+    np.testing.assert_array_equal(decode_embedding(encode_embedding([3.0, 4.0]), legacy), [3.0, 4.0])
+    np.testing.assert_array_equal(decode_embedding(None, legacy), [1.0, 2.0])
+    assert decode_embedding(None, "no es json") is None
+    assert decode_embedding(None, None) is None
+
+
+def test_pack_gallery_roundtrip():
+    rng = np.random.default_rng(0)
+    rows = [(eid, rng.standard_normal(8).astype(EMBEDDING_DTYPE)) for eid in (5, 9, 2)]
+    ids, deleted, data, full = unpack_gallery(pack_gallery(rows))
+    assert ids == [5, 9, 2]
+    assert deleted == []
+    assert full
+    np.testing.assert_array_equal(data, np.stack([emb for _, emb in rows]))
+
+
+def test_pack_gallery_delta():
+    rows = [(3, np.ones(4, dtype=EMBEDDING_DTYPE))]
+    ids, deleted, data, full = unpack_gallery(pack_gallery(rows, deleted=[7, 8], full=False))
+    assert (ids, deleted, full) == ([3], [7, 8], False)
+    np.testing.assert_array_equal(data, np.ones((1, 4)))
+
+
+def test_pack_gallery_empty():
+    assert unpack_gallery(pack_gallery([]))[:2] == ([], [])
+    assert unpack_gallery(pack_gallery([], deleted=[4], full=False))[1] == [4]
+
+
+def test_pack_gallery_minority_dimension_goes_to_deleted():
+    rows = [(1, np.ones(4, "<f4")), (2, np.ones(3, "<f4")), (3, np.zeros(4, "<f4"))]
+    ids, deleted, data, _ = unpack_gallery(pack_gallery(rows, deleted=[7, 2], full=False))
+    assert ids == [1, 3]
+    assert deleted == [7, 2]  # sin repetir el 2
+    assert data.shape == (2, 4)
+    assert unpack_gallery(pack_gallery(rows))[1] == [2]
@@ -0,0 +1,89 @@
+"""Token bucket en memoria: ráfaga, recarga y desalojo de claves inactivas (reloj simulado)."""
+
+import pytest
+from fastapi import HTTPException
+
+from api.rate_limit import TokenBucketLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _limiter(max_events=4, window=10.0, max_keys=100):
+    lim = TokenBucketLimiter(max_events, window, max_keys=max_keys, scope="test")
+    lim.clock = FakeClock()
+    return lim
+
+
+def test_burst_then_reject():
+    lim = _limiter()
+    assert [lim.allow(("1",)) for _ in range(5)] == [True, True, True, True, False]
+    assert lim.allow(("2",))  # otra clave tiene su propio bucket
+
+
+def test_refill_rate():
+    lim = _limiter(max_events=4, window=10.0)  # 0,4 tokens/s
+    for _ in range(4):
+        lim.allow(("1",))
+    lim.clock.now += 2.4  # 0,96 tokens
+    assert not lim.allow(("1",))
+    lim.clock.now += 0.2  # el rechazo no descuenta: 1,04 tokens
+    assert lim.allow(("1",))
+    assert not lim.allow(("1",))
+
+
+def test_refill_caps_at_burst():
+    lim = _limiter(max_events=4, window=10.0)
+    lim.allow(("1",))
+    lim.clock.now += 3600
+    assert [lim.allow(("1",)) for _ in range(5)] == [True, True, True, True, False]
+
+
+def test_evicts_only_idle_keys():
+    lim = _limiter(max_keys=2)
+    lim.allow(("a",))
+    lim.allow(("b",))
+    lim.clock.now += 11  # a y b inactivas más de una ventana
+    lim.allow(("c",))
+    lim.allow(("d",))
+    assert list(lim.buckets) == [("c",), ("d",)]
+
+
+def test_active_keys_are_kept_over_the_cap():
+    lim = _limiter(max_keys=2)
+    while lim.allow(("agotada",)):
+        pass
+    for i in range(10):
+        lim.allow((str(i),))
+    assert len(lim.buckets) == 11  # crece temporalmente: todas activas
+    assert not lim.allow(("agotada",))  # no se le regala una ráfaga nueva
+    lim.clock.now += 11
+    lim.allow(("nueva",))
+    assert len(lim.buckets) == 2  # al volver a entrar, se desalojan las inactivas
+
+
+def test_lru_order_follows_use():
+    lim = _limiter(max_keys=2)
+    lim.allow(("a",))
+    lim.clock.now += 5
+    lim.allow(("b",))
+    lim.allow(("a",))  # a pasa a ser la más reciente
+    lim.clock.now += 6  # b lleva 6 s inactiva, a 6 s: ninguna llega a la ventana
+    lim.allow(("c",))
+    assert len(lim.buckets) == 3
+    lim.clock.now += 5  # ahora ambas superan la ventana
+    lim.allow(("d",))
+    assert list(lim.buckets) == [("c",), ("d",)]
+
+
+def test_check_raises_429():
+    lim = _limiter(max_events=1)
+    lim.check(("1",))
+    with pytest.raises(HTTPException) as e:
+        lim.check(("1",))
+    assert e.value.status_code == 429